@@ -5,9 +5,12 @@ import mysql.connector
 from sqlalchemy import create_engine
 import schedule
 import time
+import json
+import threading
 from datetime import datetime
 import os
 import dash
+import flask
 from dash import dcc, html
 from dash.dependencies import Input, Output
 import plotly.express as px
@@ -22,6 +25,28 @@ DB_CONFIG = {
 }
 TABLE_NAME = 'agri_commodities'
 
+# Snapshot version pushed to dashboard clients over server-sent events
+data_version = {'version': 0}
+version_changed = threading.Condition()
+
+def notify_clients():
+    with version_changed:
+        data_version['version'] += 1
+        version_changed.notify_all()
+
+def version_events(last_seen):
+    yield "retry: 5000\n\n"
+    while True:
+        with version_changed:
+            if data_version['version'] == last_seen:
+                version_changed.wait(15)
+            version = data_version['version']
+        if version != last_seen:
+            last_seen = version
+            yield f"id: {version}\nevent: version\ndata: {json.dumps({'version': version})}\n\n"
+        else:
+            yield ": ping\n\n"
+
 def scrape_commodities():
     try:
         url = 'https://tradingeconomics.com/commodities'
@@ -219,6 +244,7 @@ def job():
         print("Scraped sample:\n", df.head(2))
         df = clean_data(df)
         save_to_csv(df)
+        notify_clients()
         load_to_mysql(df)
         generate_statistics(df)
     else:
@@ -288,7 +314,8 @@ def create_dashboard():
                 'boxShadow': '0 2px 4px rgba(0,0,0,0.1)',
                 'marginBottom': '20px'
             }),
-            dcc.Interval(id='interval-component', interval=30*60*1000, n_intervals=0)
+            dcc.Store(id='server-version'),
+            dcc.Interval(id='push-check', interval=1000, n_intervals=0)
         ], style={
             'maxWidth': '1200px',
             'margin': '0 auto',
@@ -300,11 +327,42 @@ def create_dashboard():
         'fontFamily': '"Roboto", sans-serif'
     })
     
+    @app.server.route('/events')
+    def push_events():
+        last_seen = flask.request.headers.get('Last-Event-ID')
+        return flask.Response(
+            version_events(int(last_seen) if last_seen else None),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache'}
+        )
+    
+    # Listens for pushed versions in the browser; charts reload only when one arrives
+    app.clientside_callback(
+        """
+        function(n) {
+            var push = window.commodityPush;
+            if (!push) {
+                push = window.commodityPush = {version: null, seen: null};
+                new EventSource('/events').addEventListener('version', function(e) {
+                    push.version = JSON.parse(e.data).version;
+                });
+            }
+            if (push.version === null || push.version === push.seen) {
+                return window.dash_clientside.no_update;
+            }
+            push.seen = push.version;
+            return push.version;
+        }
+        """,
+        Output('server-version', 'data'),
+        Input('push-check', 'n_intervals')
+    )
+    
     @app.callback(
         [Output('price-chart', 'figure'),
          Output('change-chart', 'figure'),
          Output('last-update-time', 'children')],
-        [Input('interval-component', 'n_intervals')]
+        [Input('server-version', 'data')]
     )
     def update_charts(n):
         df = read_csv()
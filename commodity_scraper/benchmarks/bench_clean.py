@@ -0,0 +1,122 @@
+# benchmarks/bench_clean.py
+"""clean_data throughput and peak memory on a large synthetic scrape.
+
+Each variant runs in its own interpreter so peak RSS is not shared.
+Run from the commodity_scraper directory:
+    python benchmarks/bench_clean.py [rows]
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import resource
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from config.settings import CONFIG
+
+
+def synthetic_scrape(rows, seed=0):
+    """A raw scraped frame: every column is an object string, as _parse_table returns it."""
+    rng = np.random.default_rng(seed)
+    names = np.array(['Soybeans\n\nUSd/Bu', 'Wheat\n\nUSd/Bu', 'Coffee\n\nUSd/Lbs', 'Cocoa\n\nUSD/T'])
+    price = rng.uniform(1, 5000, rows)
+    pct = rng.uniform(-9, 9, rows)
+    return pd.DataFrame({
+        'Agricultural': names[rng.integers(0, len(names), rows)].astype(object),
+        'Price': [f"{p:,.2f}" for p in price],
+        'Day': pd.Series(np.char.mod('%.2f', price / 100)).astype(object),
+        '%': pd.Series(np.char.mod('%.2f%%', pct)).astype(object),
+        'Weekly': pd.Series(np.char.mod('%.2f%%', pct * 2)).astype(object),
+        'Date': 'Apr/11',
+        'timestamp': '2025-04-13 23:21:34',
+    })
+
+
+def legacy_clean_data(df):
+    """The previous clean_data body without logging, kept for comparison."""
+    df.columns = [str(col).strip().replace(' ', '_').replace('%', 'percent').lower() for col in df.columns]
+    col_map = {}
+    for col in df.columns:
+        col_lower = col.lower()
+        if any(k in col_lower for k in ['commodity', 'name', 'item']):
+            col_map[col] = 'commodity'
+        elif 'price' in col_lower:
+            col_map[col] = 'price'
+        elif any(k in col_lower for k in ['change', 'chg', 'percent']):
+            col_map[col] = 'change'
+    if not col_map.get('commodity') and len(df.columns) > 0:
+        col_map[df.columns[0]] = 'commodity'
+    df = df.rename(columns=col_map)
+    df = df.dropna(subset=['commodity'])
+    df['price'] = (
+        df['price'].astype(str)
+        .str.replace(',', '', regex=False)
+        .str.replace('$', '', regex=False)
+        .str.replace('[^0-9.-]', '', regex=True)
+        .str.strip()
+        .pipe(pd.to_numeric, errors='coerce')
+    )
+    invalid_prices = df['price'].isna() | (df['price'] <= 0)
+    df.loc[invalid_prices, 'price'] = pd.NA
+    df['change'] = (
+        df['change'].astype(str)
+        .str.replace('%', '', regex=False)
+        .str.replace(',', '', regex=False)
+        .str.strip()
+        .pipe(pd.to_numeric, errors='coerce')
+        .div(100)
+        .clip(-1, 1)
+    ).fillna(0)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce').fillna(pd.Timestamp.now())
+    df = df.drop_duplicates()
+    df['commodity_lower'] = df['commodity'].str.lower()
+    df['commodity_lower'].isin(CONFIG['agri_terms']).sum()
+    return df.drop(columns=['commodity_lower'])
+
+
+def run_variant(variant, rows):
+    from src.data_processor import clean_data
+    fn = legacy_clean_data if variant == 'before' else clean_data
+    df = synthetic_scrape(rows)
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    result = fn(df)
+    elapsed = time.perf_counter() - started
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        'variant': variant,
+        'rows': len(result),
+        'seconds': elapsed,
+        'rows_per_second': rows / elapsed,
+        'peak_rss_mb': peak_rss / 1024,
+        'peak_rss_growth_mb': (peak_rss - baseline_rss) / 1024,
+    }))
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    for variant in ('before', 'after'):
+        out = subprocess.run(
+            [sys.executable, __file__, '--variant', variant, str(rows)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        print(
+            f"{r['variant']:<7} rows={rows} time={r['seconds']:7.2f}s "
+            f"throughput={r['rows_per_second']:>11,.0f} rows/s "
+            f"peak_rss={r['peak_rss_mb']:8.1f}MB (+{r['peak_rss_growth_mb']:.1f}MB during clean)"
+        )
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2 and sys.argv[1] == '--variant':
+        logging.disable(logging.WARNING)
+        run_variant(sys.argv[2], int(sys.argv[3]))
+    else:
+        main()
@@ -0,0 +1,59 @@
+# benchmarks/bench_dashboard.py
+"""Per-callback latency of the dashboard update before and after payload caching.
+
+Run from the commodity_scraper directory:
+    python benchmarks/bench_dashboard.py [iterations]
+"""
+
+import os
+import sys
+import logging
+import time
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_processor import read_csv, clean_data
+from src.cache import get_snapshot, get_payload
+from src.dashboard import render_payload
+
+
+def uncached_callback():
+    """The original callback body: parse, clean and render on every call."""
+    return render_payload(clean_data(read_csv()))
+
+
+def cached_callback():
+    """Snapshot cache plus payload cache keyed by data version."""
+    version, df = get_snapshot()
+    return get_payload(str(version), lambda: render_payload(df))
+
+
+def measure(fn, iterations):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def report(name, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(
+        f"{name:<10} mean={statistics.mean(timings):8.3f}ms "
+        f"median={statistics.median(timings):8.3f}ms p95={p95:8.3f}ms"
+    )
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    logging.disable(logging.WARNING)
+    cached_callback()  # warm the caches once, as the first client would
+    report('before', measure(uncached_callback, iterations))
+    report('after', measure(cached_callback, iterations))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/bench_export.py
+"""Snapshot export and reload: CSV + clean_data vs the memory-mapped Feather file.
+
+Also hammers the export with a concurrent reader to check it never sees a
+torn file. Run from the commodity_scraper directory:
+    python benchmarks/bench_export.py [rows]
+"""
+
+import os
+import sys
+import time
+import logging
+import tempfile
+import threading
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from config.settings import CONFIG
+from src.data_processor import clean_data, read_csv, save_to_csv
+
+RECORDED_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'agri_commodities.csv')
+
+
+def snapshot(rows):
+    """The recorded snapshot tiled to `rows` rows with distinct timestamps, cleaned."""
+    recorded = pd.read_csv(RECORDED_CSV)
+    df = pd.concat([recorded] * (rows // len(recorded) + 1), ignore_index=True).iloc[:rows]
+    df['timestamp'] = pd.Timestamp('2025-01-01') + pd.to_timedelta(np.arange(rows), unit='s')
+    return clean_data(df)
+
+
+def best_of(fn, repeat=5):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return min(times), statistics.median(times)
+
+
+def torn_reads(df, seconds=2.0):
+    """Rewrite the export continuously while a reader loads it; return (reads, bad reads)."""
+    save_to_csv(df)
+    stop = threading.Event()
+    counts = {'reads': 0, 'bad': 0}
+
+    def reader():
+        while not stop.is_set():
+            try:
+                loaded = read_csv(CONFIG['export']['feather_file'])
+                ok = loaded is not None and len(loaded) == len(df)
+            except Exception:
+                ok = False
+            counts['reads'] += 1
+            counts['bad'] += not ok
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        save_to_csv(df)
+    stop.set()
+    thread.join()
+    return counts['reads'], counts['bad']
+
+
+def main():
+    logging.disable(logging.WARNING)
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    workdir = tempfile.mkdtemp(prefix='commodity-export-')
+    CONFIG['csv_file'] = os.path.join(workdir, 'agri_commodities.csv')
+    CONFIG['export']['feather_file'] = os.path.join(workdir, 'agri_commodities.feather')
+    CONFIG['export']['formats'] = ['csv', 'feather']
+
+    df = snapshot(rows)
+    write_best, _ = best_of(lambda: save_to_csv(df), repeat=3)
+    csv_best, csv_median = best_of(lambda: clean_data(read_csv(CONFIG['csv_file'])))
+    feather_best, feather_median = best_of(lambda: read_csv(CONFIG['export']['feather_file']))
+    print(f"rows={rows} export (csv + feather) {write_best * 1000:.0f}ms")
+    print(f"before  csv + clean_data  best={csv_best * 1000:8.1f}ms median={csv_median * 1000:8.1f}ms")
+    print(f"after   feather mmap      best={feather_best * 1000:8.1f}ms median={feather_median * 1000:8.1f}ms "
+          f"({csv_median / feather_median:.0f}x faster)")
+
+    reads, bad = torn_reads(snapshot(20_000))
+    print(f"concurrent reader: {reads} reads during rewrites, {bad} torn or failed")
+
+
+if __name__ == '__main__':
+    main()
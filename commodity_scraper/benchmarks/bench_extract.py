@@ -0,0 +1,87 @@
+# benchmarks/bench_extract.py
+"""Table selection and parsing: BeautifulSoup html.parser path vs the lxml path.
+
+Run from the commodity_scraper directory:
+    python benchmarks/bench_extract.py [iterations]
+"""
+
+import os
+import sys
+import time
+import logging
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from config.settings import CONFIG
+from src.extract import parse_html, extract_rows
+from src.table_selection import find_table
+from src.scraper import _build_frame
+from benchmarks.fixtures import load_page
+
+
+def legacy_extract(content):
+    """The previous scrape_commodities selection and _parse_table, kept for comparison."""
+    soup = BeautifulSoup(content, 'html.parser')
+    best_table = None
+    max_agri_matches = 0
+    for table in soup.find_all('table'):
+        prev_sibling = table.find_previous(['h2', 'h3'])
+        heading = prev_sibling.text.strip().lower() if prev_sibling else ''
+        is_agri_heading = 'agricult' in heading or 'soft' in heading
+        rows = table.find_all('tr')
+        agri_matches = sum(
+            1 for row in rows
+            for term in CONFIG['agri_terms']
+            if term in str(row).lower()
+        )
+        if (is_agri_heading and agri_matches > 0) or agri_matches > max_agri_matches:
+            max_agri_matches = agri_matches
+            best_table = table
+    headers = [th.text.strip() for th in best_table.find_all('th')]
+    rows = [
+        [td.text.strip() for td in tr.find_all('td')]
+        for tr in best_table.find_all('tr')[1:] if tr.find_all('td')
+    ]
+    return _build_frame(headers, rows)
+
+
+def lxml_extract(content):
+    table, _ = find_table(parse_html(content))
+    return _build_frame(*extract_rows(table))
+
+
+def _comparable(df):
+    # html.parser folds blank lines inside a cell differently from lxml
+    df = df.drop(columns='timestamp')
+    df['commodity'] = df['commodity'].str.replace(r'\s+', ' ', regex=True)
+    return df
+
+
+def measure(fn, content, iterations):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn(content)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    logging.disable(logging.WARNING)
+    for scale in (1, 10, 100):
+        content = load_page(scale)
+        old, new = _comparable(legacy_extract(content)), _comparable(lxml_extract(content))
+        assert old.equals(new), 'paths disagree'
+        before = measure(legacy_extract, content, iterations)
+        after = measure(lxml_extract, content, iterations)
+        print(
+            f"scale={scale:<4} bytes={len(content):>9} rows={len(new):>5} "
+            f"html.parser={before:9.2f}ms lxml={after:8.2f}ms speedup={before / after:5.1f}x"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_history.py
+"""History chart: plotting every stored sample vs server-side downsampling.
+
+Writes a year of 30-minute samples for every commodity into a temporary
+history store, then times the read, the downsampling and the figure, and
+reports the size of the figure JSON sent to the browser. Run from the
+commodity_scraper directory:
+    python benchmarks/bench_history.py [commodities] [days]
+"""
+
+import os
+import sys
+import time
+import logging
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.io as pio
+from config.settings import CONFIG
+from src import history
+from src.downsample import downsample
+
+
+def store(commodities, days):
+    """Random-walk prices every 30 minutes for `days` days, appended to the history store."""
+    timestamps = pd.date_range('2025-01-01', periods=days * 48, freq='30min')
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'commodity': np.repeat([f'commodity-{i}' for i in range(commodities)], len(timestamps)),
+        'timestamp': np.tile(timestamps.to_numpy(), commodities),
+        'price': 500 + np.cumsum(rng.normal(size=commodities * len(timestamps))),
+    })
+    history.append_history(df)
+    return timestamps[0], timestamps[-1]
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    logging.disable(logging.WARNING)
+    commodities = int(sys.argv[1]) if len(sys.argv) > 1 else 23
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 365
+    CONFIG['history']['path'] = tempfile.mkdtemp(prefix='commodity-history-')
+    start, end = store(commodities, days)
+    points = CONFIG['dashboard']['history_points']
+
+    df, read_seconds = timed(lambda: history.read_history(start, end, columns=['price']))
+    print(f"{len(df)} samples ({commodities} commodities x {days} days), read {read_seconds * 1000:.0f}ms")
+
+    raw, raw_seconds = timed(lambda: pio.to_json(px.line(df, x='timestamp', y='price', color='commodity')))
+    print(f"before  all samples   plot={raw_seconds * 1000:7.0f}ms json={len(raw) / 1e6:6.2f}MB")
+    for method in ('lttb', 'minmax'):
+        reduced, reduce_seconds = timed(lambda: downsample(df, points, method=method))
+        fig, plot_seconds = timed(lambda: pio.to_json(px.line(reduced, x='timestamp', y='price', color='commodity')))
+        print(f"after   {method:<6} {points:>5}  downsample={reduce_seconds * 1000:5.0f}ms "
+              f"plot={plot_seconds * 1000:5.0f}ms json={len(fig) / 1e6:6.2f}MB ({len(reduced)} points)")
+
+
+if __name__ == '__main__':
+    main()
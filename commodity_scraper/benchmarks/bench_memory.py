@@ -0,0 +1,61 @@
+# benchmarks/bench_memory.py
+"""Memory of a large snapshot history: untyped object columns vs the typed snapshot schema.
+
+Run from the commodity_scraper directory:
+    python benchmarks/bench_memory.py [snapshots]
+"""
+
+import os
+import sys
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from src.schema import enforce_schema
+
+RECORDED_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'agri_commodities.csv')
+
+
+def untyped_history(snapshots):
+    """Tile the recorded snapshot the way the old pipeline stored it.
+
+    Only price, day and change were numeric; the commodity cell kept its unit
+    and the other percentage columns stayed '6.08%' strings.
+    """
+    snapshot = pd.read_csv(RECORDED_CSV, dtype=str)
+    snapshot[['price', 'day', 'change']] = snapshot[['price', 'day', 'change']].astype('float64')
+    rows = len(snapshot)
+    df = pd.concat([snapshot] * snapshots, ignore_index=True)
+    # Fresh string objects per row, as each scrape creates them
+    for col in ['commodity', 'weekly', 'monthly', 'ytd', 'yoy', 'date']:
+        df[col] = [str(v) + '' for v in df[col]]
+    start = pd.Timestamp('2025-01-01')
+    df['timestamp'] = start + pd.to_timedelta(np.repeat(np.arange(snapshots) * 30, rows), unit='min')
+    return df
+
+
+def report(name, df):
+    usage = df.memory_usage(deep=True)
+    print(f"{name:<8} rows={len(df):>9,} total={usage.sum() / 2**20:9.1f}MB per_row={usage.sum() / len(df):7.1f}B")
+    return usage
+
+
+def main():
+    snapshots = int(sys.argv[1]) if len(sys.argv) > 1 else 48 * 365
+    logging.disable(logging.WARNING)
+    before = untyped_history(snapshots)
+    after = enforce_schema(before)
+    before_usage = report('before', before)
+    after_usage = report('after', after)
+    print(f"reduction={before_usage.sum() / after_usage.sum():.1f}x")
+    print(pd.DataFrame({
+        'before_mb': before_usage.drop('Index') / 2**20,
+        'after_mb': after_usage.reindex(before_usage.index).drop('Index') / 2**20,
+        'after_dtype': after.dtypes.reindex(before_usage.index.drop('Index')),
+    }).round(2).to_string())
+
+
+if __name__ == '__main__':
+    main()
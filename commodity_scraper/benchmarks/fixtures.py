@@ -0,0 +1,135 @@
+# benchmarks/fixtures.py
+"""HTML fixtures shaped like the tradingeconomics commodities page.
+
+Rows come from the recorded snapshots in the repository CSVs. A scale
+above 1 repeats every table's rows with numbered names to produce
+synthetic pages with thousands of rows.
+
+Regenerate the saved fixture with:
+    python benchmarks/fixtures.py
+"""
+
+import csv
+import html
+import http.server
+import os
+import random
+import threading
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BENCH_DIR, 'fixtures')
+PAGE_FIXTURE = os.path.join(FIXTURE_DIR, 'commodities.html')
+
+_RECORDED = {
+    'Energy': os.path.join(BENCH_DIR, '..', 'agri_commodities.csv'),
+    'Agricultural': os.path.join(BENCH_DIR, '..', '..', 'agri_commodities.csv'),
+}
+_SYNTHETIC = {
+    'Metals': ['Gold\n\nUSD/t.oz', 'Silver\n\nUSD/t.oz', 'Copper\n\nUSD/Lbs', 'Steel\n\nCNY/T'],
+    'Livestock': ['Feeder Cattle\n\nUSd/Lbs', 'Live Cattle\n\nUSd/Lbs', 'Lean Hogs\n\nUSd/Lbs', 'Eggs US\n\nUSD/Dozen'],
+}
+_HEADERS = ['Price', 'Day', '%', 'Weekly', 'Monthly', 'YTD', 'YoY', 'Date']
+
+
+def _recorded_rows(path):
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            change = float(row['change']) * 100
+            yield [
+                row['commodity'], row['price'], row['day'], f"{change:.2f}%",
+                row['weekly'], row['monthly'], row['ytd'], row['yoy'], row['date']
+            ]
+
+
+def _synthetic_rows(names, rng):
+    for name in names:
+        price = rng.uniform(1, 3000)
+        yield [
+            name, f"{price:.2f}", f"{rng.uniform(-5, 5):.2f}", f"{rng.uniform(-3, 3):.2f}%",
+            f"{rng.uniform(-9, 9):.2f}%", f"{rng.uniform(-15, 15):.2f}%",
+            f"{rng.uniform(-30, 30):.2f}%", f"{rng.uniform(-40, 40):.2f}%", 'Apr/11'
+        ]
+
+
+def _scaled(rows, scale):
+    for copy in range(scale):
+        for row in rows:
+            if copy == 0:
+                yield row
+            else:
+                name, _, unit = row[0].partition('\n\n')
+                yield [f"{name} {copy}\n\n{unit}"] + row[1:]
+
+
+def _render_name(cell):
+    name, _, unit = cell.partition('\n\n')
+    slug = name.lower().replace(' ', '-')
+    return (
+        f'<td class="datatable-item-first"><a href="/commodity/{slug}">'
+        f'<b>{html.escape(name)}</b></a>\n\n<div class="small">{html.escape(unit)}</div></td>'
+    )
+
+
+def _render_table(group, rows):
+    head = ''.join(f'<th>{h}</th>' for h in [group] + _HEADERS)
+    body = []
+    for row in rows:
+        cells = ''.join(f'<td class="datatable-item">{html.escape(c)}</td>' for c in row[1:])
+        body.append(f'<tr data-symbol="{html.escape(row[0][:8])}">{_render_name(row[0])}{cells}</tr>')
+    return (
+        f'<div class="card"><h2>{group}</h2>'
+        f'<table class="table table-hover"><thead><tr>{head}</tr></thead>'
+        f'<tbody>{"".join(body)}</tbody></table></div>'
+    )
+
+
+def build_page(scale=1, seed=0):
+    """Return the HTML for a commodities page with every table repeated `scale` times."""
+    rng = random.Random(seed)
+    groups = {group: list(_recorded_rows(path)) for group, path in _RECORDED.items()}
+    groups.update({group: list(_synthetic_rows(names, rng)) for group, names in _SYNTHETIC.items()})
+    nav = ''.join(f'<li><a href="/{i}">Link {i}</a></li>' for i in range(200))
+    tables = ''.join(_render_table(g, list(_scaled(rows, scale))) for g, rows in groups.items())
+    return (
+        '<!DOCTYPE html><html><head><title>Commodities</title></head><body>'
+        f'<nav><ul>{nav}</ul></nav><main><h1>Commodities</h1>{tables}</main>'
+        '<footer><p>Footer</p></footer></body></html>'
+    ).encode('utf-8')
+
+
+def load_page(scale=1):
+    """Return the saved fixture for scale 1, or generate a scaled page."""
+    if scale == 1 and os.path.exists(PAGE_FIXTURE):
+        with open(PAGE_FIXTURE, 'rb') as f:
+            return f.read()
+    return build_page(scale)
+
+
+def serve_page(content):
+    """Serve content for every GET on a local HTTP stub; returns (server, base_url).
+
+    The stub sends no validators, so every fetch downloads the full page.
+    """
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+if __name__ == '__main__':
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    with open(PAGE_FIXTURE, 'wb') as f:
+        f.write(build_page())
+    print(f"Wrote {PAGE_FIXTURE}")
@@ -0,0 +1,186 @@
+# benchmarks/run.py
+"""Offline end-to-end benchmark of the scrape -> clean -> load pipeline.
+
+Each scale runs main.job against a synthetic commodities page served by a
+local HTTP stub, with SQLite standing in for MySQL and every output path
+in a temporary directory. Each scale runs in its own interpreter so peak
+RSS is not shared. Results are written as JSON; pass a previous result
+file to --compare to flag regressions.
+
+Run from the commodity_scraper directory:
+    python benchmarks/run.py [--scales 1,10,50] [--repeat 5] [--output bench.json]
+                             [--compare baseline.json] [--threshold 0.2]
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import platform
+import argparse
+import resource
+import statistics
+import subprocess
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+
+# Sub-stages timed inside the job, reported next to the job's own stages
+SUB_STAGES = ['fetch_request_seconds', 'select_table_seconds', 'parse_table_seconds', 'db_upsert_seconds']
+
+
+def _configure(workdir, base_url):
+    from config.settings import CONFIG
+    CONFIG['scrape_urls'] = [f"{base_url}/commodities"]
+    CONFIG['csv_file'] = os.path.join(workdir, 'agri_commodities.csv')
+    CONFIG['db']['url'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    CONFIG['fetch']['state_file'] = os.path.join(workdir, 'fetch_state.json')
+    CONFIG['history']['path'] = os.path.join(workdir, 'history')
+    CONFIG['rollups']['path'] = os.path.join(workdir, 'rollups')
+    CONFIG['cdc']['stream_file'] = os.path.join(workdir, 'changes.jsonl')
+    CONFIG['scheduler']['status_file'] = os.path.join(workdir, 'scraper_status.json')
+    CONFIG['analytics']['path'] = os.path.join(workdir, 'analytics.json')
+    CONFIG['detail']['enabled'] = False
+
+
+def run_scale(scale, repeat):
+    """Run the job `repeat` times at one scale and print one JSON result line."""
+    from benchmarks.fixtures import load_page, serve_page
+    workdir = tempfile.mkdtemp(prefix='commodity-bench-')
+    server, base_url = serve_page(load_page(scale))
+    _configure(workdir, base_url)
+    # Relative output paths such as the detail Parquet file land in the temp dir
+    os.chdir(workdir)
+
+    import main
+    from src import cdc, metrics, scraper
+    from src.database import init_engine
+    from src.runner import JobRunner
+    logging.disable(logging.WARNING)
+    init_engine()
+
+    runner = JobRunner(main.job, interval=3600, history_size=repeat)
+    runs = []
+    for _ in range(repeat):
+        # Forget the previous frame and snapshot so neither the unchanged-page
+        # shortcut nor change capture skips any stage
+        scraper._last_frames.clear()
+        cdc._previous = None
+        before_rows = metrics.get_counters().get('rows{stage="clean"}', 0)
+        before_subs = {name: metrics.get_histogram(name)['sum'] for name in SUB_STAGES}
+        runner.run_once()
+        run = runner.history[-1]
+        if run['status'] != 'ok':
+            raise RuntimeError(f"Job ended with status {run['status']}: {run.get('error')}")
+        stages = dict(run['stages'])
+        for name in SUB_STAGES:
+            stages[name.replace('_seconds', '')] = metrics.get_histogram(name)['sum'] - before_subs[name]
+        runs.append({
+            'seconds': run['duration'],
+            'rows': metrics.get_counters().get('rows{stage="clean"}', 0) - before_rows,
+            'stages': stages,
+        })
+        time.sleep(1)  # distinct second-resolution snapshot timestamps
+
+    server.shutdown()
+    seconds = [r['seconds'] for r in runs]
+    rows = runs[-1]['rows']
+    print(json.dumps({
+        'scale': scale,
+        'page_bytes': len(load_page(scale)),
+        'rows': rows,
+        'repeat': repeat,
+        'seconds_median': statistics.median(seconds),
+        'seconds_min': min(seconds),
+        'rows_per_second': rows / statistics.median(seconds),
+        'stages_median': {
+            name: statistics.median(r['stages'][name] for r in runs) for name in runs[0]['stages']
+        },
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, threshold):
+    """Return a list of regressions: metrics more than `threshold` worse than the baseline."""
+    regressions = []
+    previous = {r['scale']: r for r in baseline['results']}
+    for result in current['results']:
+        base = previous.get(result['scale'])
+        if base is None:
+            continue
+        checks = {'seconds_median': (result['seconds_median'], base['seconds_median']),
+                  'peak_rss_mb': (result['peak_rss_mb'], base['peak_rss_mb'])}
+        for name, value in result['stages_median'].items():
+            if name in base['stages_median']:
+                checks[f'stage:{name}'] = (value, base['stages_median'][name])
+        for name, (value, old) in checks.items():
+            # Sub-millisecond stages are too noisy to flag
+            if old > 0 and value > old * (1 + threshold) and (name == 'peak_rss_mb' or value - old > 0.001):
+                regressions.append(f"scale {result['scale']} {name}: {old:.4f} -> {value:.4f} (+{value / old - 1:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default='1,10,50', help='comma-separated page scales')
+    parser.add_argument('--repeat', type=int, default=5, help='job runs per scale')
+    parser.add_argument('--output', default='bench.json', help='where to write the JSON results')
+    parser.add_argument('--compare', help='previous results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='relative slowdown flagged as a regression')
+    args = parser.parse_args()
+
+    results = []
+    for scale in (int(s) for s in args.scales.split(',')):
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--scale', str(scale), str(args.repeat)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        results.append(r)
+        stages = ' '.join(f"{k}={v * 1000:.1f}ms" for k, v in r['stages_median'].items())
+        print(
+            f"scale={scale:<4} rows={r['rows']:<6} job={r['seconds_median'] * 1000:8.1f}ms "
+            f"throughput={r['rows_per_second']:>9,.0f} rows/s peak_rss={r['peak_rss_mb']:7.1f}MB\n    {stages}"
+        )
+
+    current = {
+        'meta': {
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(current, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare} (threshold {args.threshold:.0%})")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2 and sys.argv[1] == '--scale':
+        run_scale(int(sys.argv[2]), int(sys.argv[3]))
+    else:
+        main()
@@ -6,10 +6,128 @@ CONFIG = {
         'host': 'localhost',
         'user': 'root',
         'password': 'root123',
-        'database': 'commodities_db'
+        'database': 'commodities_db',
+        'batch_size': 500,
+        'pool': {
+            'size': 5,
+            'max_overflow': 10,
+            'timeout': 30,
+            'recycle': 1800,
+            'pre_ping': True
+        }
     },
     'table_name': 'agri_commodities',
-    'scrape_url': 'https://tradingeconomics.com/commodities',
+    'scrape_urls': [
+        'https://tradingeconomics.com/commodities'
+    ],
+    'fetch': {
+        'max_connections': 20,
+        'per_host_limit': 4,
+        'keepalive_timeout': 60,
+        'request_timeout': 15,
+        'total_budget': 45,
+        'retries': 3,
+        'backoff': 0.5,
+        'state_file': 'fetch_state.json'
+    },
     'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-    'agri_terms': {'corn', 'wheat', 'soybeans', 'sugar', 'coffee', 'cocoa', 'rice'}
+    'agri_terms': {'corn', 'wheat', 'soybeans', 'sugar', 'coffee', 'cocoa', 'rice'},
+    'selection': {
+        # Scorer name -> weight; 'sources' maps a URL to its own weights
+        'scorers': {'heading': 10, 'agri_terms': 1},
+        'heading_keywords': ['agricult', 'soft'],
+        'min_score': 2,
+        'sources': {}
+    },
+    'dashboard': {
+        'payload_cache_size': 4,
+        'table_source': 'db',
+        'page_size': 20,
+        # Server-sent version events: each /events request is held until the
+        # snapshot changes or push_hold_seconds pass, then the browser reconnects
+        # after push_retry_ms. One watcher per worker checks the export every
+        # push_poll_seconds; push_check_ms is how often the page looks at the last
+        # pushed version (ms, no server request)
+        'push_hold_seconds': 25,
+        'push_poll_seconds': 2,
+        'push_retry_ms': 1000,
+        'push_check_ms': 1000,
+        # History chart: points kept per commodity after server-side downsampling
+        # ('lttb' or 'minmax'), the default range shown and how many figures
+        # (one per selection and range) are cached apart from the payloads above
+        'history_points': 1000,
+        'history_downsample': 'lttb',
+        'history_days': 30,
+        'history_cache_size': 16,
+        # History reads kept for the table when it pages over the history store
+        # (table_source 'history', or the fallback when the database is down)
+        'table_history_cache_size': 2
+    },
+    'history': {
+        'path': 'history',
+        'compact_after_days': 1,
+        'compact_interval': 3600
+    },
+    'cdc': {
+        # Diff each snapshot against the previous one; sinks then write only what
+        # moved and every change is appended to the stream file as a JSON line
+        'enabled': True,
+        'stream_file': 'changes.jsonl'
+    },
+    'rollups': {
+        'path': 'rollups',
+        # Any of 'hourly', 'daily', 'weekly'
+        'frequencies': ['hourly', 'daily', 'weekly']
+    },
+    'analytics': {
+        # Window name -> length in days
+        'windows': {'1d': 1, '7d': 7, '30d': 30},
+        'path': 'analytics.json'
+    },
+    'detail': {
+        # Per-commodity detail pages, parsed in worker processes
+        'enabled': False,
+        'url_template': 'https://tradingeconomics.com/commodity/{slug}',
+        'workers': 4,
+        'task_timeout': 20,
+        'path': 'commodity_details.parquet'
+    },
+    'scheduler': {
+        'interval': 30 * 60,
+        'history_size': 50,
+        # Job history and scraper metrics, rewritten after each run for /jobs and
+        # /metrics/scraper on server processes that don't run the scraper
+        'status_file': 'scraper_status.json'
+    },
+    'logging': {
+        'level': 'INFO',
+        # Enqueue records and write them from a listener thread
+        'async': True,
+        'file': 'scraper.log',
+        'access_file': 'access.log',
+        'access_sample_rate': 0.1,
+        'max_bytes': 10 * 1024 * 1024,
+        'backup_count': 5,
+        'batch_size': 100,
+        'flush_interval': 1.0
+    },
+    'export': {
+        # Written on every run; the first columnar format present is what the dashboard loads
+        'formats': ['csv', 'feather'],
+        'feather_file': 'agri_commodities.feather',
+        'parquet_file': 'agri_commodities.parquet'
+    },
+    'server': {
+        # Production serving (python main.py serve); workers None = one per core plus one
+        'host': '0.0.0.0',
+        'port': 8050,
+        'workers': None,
+        # gevent workers hold the /events long-polls as greenlets rather than
+        # threads; worker_connections caps concurrent requests per worker
+        'worker_class': 'gevent',
+        'worker_connections': 1000,
+        'threads': 8,
+        'timeout': 60,
+        'keepalive': 5
+    }
 }
\ No newline at end of file
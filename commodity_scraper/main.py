@@ -1,49 +1,112 @@
 # main.py
 
-import schedule
-import time
+import sys
 import threading
 import logging
-from src.scraper import scrape_commodities
-from src.data_processor import clean_data, save_to_csv
-from src.database import load_to_mysql
+from typing import Optional
+from config.settings import CONFIG
+from src import metrics
+from src.runner import stage, start_runner
+from src.scraper import UNCHANGED, scrape_commodities, scrape_details, commit_scrape_state, discard_scrape_state
+from src.data_processor import clean_data, save_to_csv, save_details, load_snapshot
+from src.cdc import bootstrap_cdc, capture_changes, commit_changes, delta_rows
+from src.cache import publish_snapshot
+from src.history import append_history, start_compaction
+from src.rollups import bootstrap_rollups, update_rollups
+from src.database import init_engine, load_to_mysql
 from src.stats import generate_statistics
-from src.dashboard import create_dashboard
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('scraper.log'),
-        logging.StreamHandler()
-    ]
-)
+from src.analytics import bootstrap_analytics, update_analytics
+from src.logging_setup import setup_logging
+
 logger = logging.getLogger(__name__)
 
-def job():
+def job() -> Optional[str]:
     logger.info("Starting job")
-    df = scrape_commodities()
+    with stage('scrape'):
+        df = scrape_commodities()
+    if df is UNCHANGED:
+        # Parse, clean, CSV, history and DB stages all skipped
+        metrics.incr('job_skipped_unchanged')
+        logger.info(f"Source unchanged, job skipped; metrics: {metrics.get_counters()}")
+        return 'unchanged'
     if df is not None:
-        df = clean_data(df)
+        with stage('clean'):
+            df = clean_data(df)
         if df is not None:
-            save_to_csv(df)
-            load_to_mysql(df)
-            generate_statistics(df)
+            with stage('diff'):
+                changes = capture_changes(df)
+            with stage('history'):
+                new_rows = append_history(df)
+            with stage('rollups'):
+                update_rollups(new_rows)
+            # Without a diff (disabled or failed) every sink gets the full snapshot
+            if changes is None or not changes.empty:
+                with stage('csv'):
+                    saved = save_to_csv(df)
+                with stage('publish'):
+                    publish_snapshot(df)
+                with stage('database'):
+                    loaded = load_to_mysql(delta_rows(df, changes)) is not None
+            else:
+                saved = loaded = True
+                logger.info("No commodity changed, snapshot exports and database left as is")
+            committed = saved and loaded and commit_changes(df, changes)
+            with stage('statistics'):
+                generate_statistics(df)
+            with stage('analytics'):
+                update_analytics(df)
+            with stage('details'):
+                save_details(scrape_details(df))
+            if committed:
+                commit_scrape_state()
+                return 'ok'
+            # Not marking the pages as seen makes the next run scrape and diff them again
+            logger.warning("Sinks not updated, this scrape will be processed again next run")
+            discard_scrape_state()
+            return 'sinks_failed'
     else:
         logger.warning("No data scraped")
+    discard_scrape_state()
+    return 'no_data'
+
+def bootstrap():
+    """Rebuild rollups and rolling analytics from history before the first run."""
+    bootstrap_rollups()
+    bootstrap_analytics()
+
+def start_scraper():
+    init_engine()
+    bootstrap_cdc(load_snapshot())
+    start_compaction()
+    # Both bootstraps read history and can take a while; run them on the runner
+    # thread so startup isn't blocked, and so they finish before the first job
+    # updates the rollups and analytics
+    start_runner(job, setup=bootstrap)
 
-def main():
-    job()
-    schedule.every(30).minutes.do(job)
-    app = create_dashboard()
-    
-    def run_scheduler():
-        while True:
-            schedule.run_pending()
-            time.sleep(60)
-    
-    threading.Thread(target=run_scheduler, daemon=True).start()
-    app.run(debug=False, host='0.0.0.0', port=8050)
+def main(mode: str = 'all'):
+    """Run 'all' (dev server and scraper in one process), 'scrape' or 'serve'.
+
+    In production run 'scrape' and 'serve' as separate processes: the
+    scraper exports each snapshot as a memory-mapped Arrow file that every
+    gunicorn worker reads.
+    """
+    # Not at import time: spawned worker processes re-import this module.
+    # In serve mode the separate scrape process owns the log files.
+    setup_logging(files=mode != 'serve')
+    if mode == 'scrape':
+        start_scraper()
+        threading.Event().wait()
+    elif mode == 'serve':
+        from src.server import serve
+        serve()
+    elif mode == 'all':
+        from src.dashboard import create_dashboard
+        app = create_dashboard()
+        # Serves the last good snapshot while the first scrape runs in the background
+        start_scraper()
+        app.run(debug=False, host=CONFIG['server']['host'], port=CONFIG['server']['port'])
+    else:
+        raise SystemExit(f"Unknown mode {mode!r}, expected all, scrape or serve")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(sys.argv[1] if len(sys.argv) > 1 else 'all')
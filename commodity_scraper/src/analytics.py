@@ -0,0 +1,182 @@
+# src/analytics.py
+
+import json
+import math
+import threading
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+import pandas as pd
+from config.settings import CONFIG
+from src import metrics
+from src.files import atomic_write_text
+from src.history import read_history
+
+logger = logging.getLogger(__name__)
+
+
+class RollingWindow:
+    """Time-bounded window over one commodity's prices, updated in O(1) amortized.
+
+    Keeps running sums for the moving average and return volatility, and
+    monotonic deques for the min and max.
+    """
+
+    def __init__(self, span: timedelta):
+        self.span = span
+        self.prices = deque()
+        self.returns = deque()
+        self.price_sum = 0.0
+        self.return_sum = 0.0
+        self.return_sumsq = 0.0
+        self._mins = deque()
+        self._maxs = deque()
+
+    def push(self, ts: datetime, price: float, ret: Optional[float]) -> None:
+        self.prices.append((ts, price))
+        self.price_sum += price
+        while self._mins and self._mins[-1][1] >= price:
+            self._mins.pop()
+        self._mins.append((ts, price))
+        while self._maxs and self._maxs[-1][1] <= price:
+            self._maxs.pop()
+        self._maxs.append((ts, price))
+        if ret is not None:
+            self.returns.append((ts, ret))
+            self.return_sum += ret
+            self.return_sumsq += ret * ret
+        self._evict(ts)
+
+    def _evict(self, now: datetime) -> None:
+        cutoff = now - self.span
+        while self.prices and self.prices[0][0] <= cutoff:
+            _, price = self.prices.popleft()
+            self.price_sum -= price
+        while self.returns and self.returns[0][0] <= cutoff:
+            _, ret = self.returns.popleft()
+            self.return_sum -= ret
+            self.return_sumsq -= ret * ret
+        while self._mins and self._mins[0][0] <= cutoff:
+            self._mins.popleft()
+        while self._maxs and self._maxs[0][0] <= cutoff:
+            self._maxs.popleft()
+
+    def summary(self) -> Dict[str, Any]:
+        n = len(self.returns)
+        mean_ret = self.return_sum / n if n else 0.0
+        variance = max(self.return_sumsq / n - mean_ret * mean_ret, 0.0) if n > 1 else 0.0
+        volatility = math.sqrt(variance * n / (n - 1)) if n > 1 else None
+        latest = self.returns[-1][1] if n else None
+        zscore = (latest - mean_ret) / volatility if volatility and latest is not None else None
+        return {
+            'samples': len(self.prices),
+            'moving_average': self.price_sum / len(self.prices) if self.prices else None,
+            'volatility': volatility,
+            'min': self._mins[0][1] if self._mins else None,
+            'max': self._maxs[0][1] if self._maxs else None,
+            'zscore': zscore
+        }
+
+
+class RollingAnalytics:
+    """Per-commodity rolling windows fed one snapshot at a time."""
+
+    def __init__(self, windows: Dict[str, int]):
+        self.spans = {name: timedelta(days=days) for name, days in windows.items()}
+        self.windows: Dict[str, Dict[str, RollingWindow]] = {}
+        self.last: Dict[str, tuple] = {}
+
+    def update(self, df: pd.DataFrame) -> int:
+        """Push one snapshot; rows older than or equal to the last seen sample are ignored.
+
+        Returns the number of rows applied.
+        """
+        applied = 0
+        rows = df[['commodity', 'timestamp', 'price']].dropna()
+        for commodity, ts, price in rows.sort_values('timestamp').itertuples(index=False, name=None):
+            commodity, ts, price = str(commodity), pd.Timestamp(ts).to_pydatetime(), float(price)
+            last = self.last.get(commodity)
+            if last is not None and ts <= last[0]:
+                continue
+            ret = price / last[1] - 1 if last is not None and last[1] else None
+            windows = self.windows.setdefault(
+                commodity, {name: RollingWindow(span) for name, span in self.spans.items()}
+            )
+            for window in windows.values():
+                window.push(ts, price, ret)
+            self.last[commodity] = (ts, price)
+            applied += 1
+        return applied
+
+    def results(self) -> List[Dict[str, Any]]:
+        records = []
+        for commodity, windows in self.windows.items():
+            for name, window in windows.items():
+                records.append({
+                    'commodity': commodity,
+                    'window': name,
+                    'latest_price': self.last[commodity][1],
+                    'updated_at': self.last[commodity][0].isoformat(),
+                    **window.summary()
+                })
+        return records
+
+
+_analytics: Optional[RollingAnalytics] = None
+_lock = threading.Lock()
+
+
+def _engine() -> RollingAnalytics:
+    global _analytics
+    if _analytics is None:
+        _analytics = RollingAnalytics(CONFIG['analytics']['windows'])
+    return _analytics
+
+
+def _persist(records: List[Dict[str, Any]]) -> None:
+    atomic_write_text(
+        CONFIG['analytics']['path'],
+        json.dumps({'generated_at': datetime.now().isoformat(), 'results': records})
+    )
+
+
+def bootstrap_analytics() -> None:
+    """Warm the windows once at startup from the history covering the longest window."""
+    try:
+        days = max(CONFIG['analytics']['windows'].values())
+        history = read_history(start=datetime.now() - timedelta(days=days),
+                               columns=['commodity', 'timestamp', 'price'])
+        if history.empty:
+            return
+        with _lock:
+            applied = _engine().update(history)
+        logger.info(f"Bootstrapped rolling analytics from {applied} history rows")
+    except Exception as e:
+        logger.error(f"Error bootstrapping rolling analytics: {e}")
+
+
+def update_analytics(df: Optional[pd.DataFrame]) -> Optional[List[Dict[str, Any]]]:
+    """Push a snapshot into the rolling windows and persist the results."""
+    if df is None or df.empty:
+        logger.warning("No data for rolling analytics")
+        return None
+    try:
+        with metrics.timer('analytics_update_seconds'), _lock:
+            applied = _engine().update(df)
+            records = _engine().results()
+            _persist(records)
+        logger.info(f"Rolling analytics updated with {applied} rows for {len(_engine().windows)} commodities")
+        return records
+    except Exception as e:
+        logger.error(f"Error updating rolling analytics: {e}")
+        return None
+
+
+def load_analytics() -> Optional[Dict[str, Any]]:
+    """Read the persisted analytics results without recomputing anything."""
+    try:
+        with open(CONFIG['analytics']['path']) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,126 @@
+# src/cache.py
+
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+import pandas as pd
+from config.settings import CONFIG
+from src import events, metrics
+from src.data_processor import load_snapshot, snapshot_path
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_state = {
+    'version': None,
+    'df': None,
+    'mtime': None
+}
+
+_payload_lock = threading.Lock()
+_payloads: 'OrderedDict[str, Any]' = OrderedDict()
+_history_payloads: 'OrderedDict[str, Any]' = OrderedDict()
+_history_frames: 'OrderedDict[Any, Any]' = OrderedDict()
+
+
+def _csv_mtime() -> Optional[Tuple[str, int]]:
+    # Keyed by path too, so a switch between CSV and the columnar export reloads
+    path = snapshot_path()
+    try:
+        return (path, os.stat(path).st_mtime_ns) if path is not None else None
+    except OSError:
+        return None
+
+
+def _version(mtime: Tuple[str, int]) -> str:
+    # Derived from the export file rather than counted per process, so every
+    # server worker that has loaded the same file reports the same version
+    return str(mtime[1])
+
+
+def publish_snapshot(df: Optional[pd.DataFrame]) -> Optional[str]:
+    """Publish an already-cleaned, already-exported snapshot and return its version."""
+    if df is None or df.empty:
+        return _state['version']
+    mtime = _csv_mtime()
+    with _lock:
+        _state['version'] = _version(mtime) if mtime is not None else f"local-{time.time_ns()}"
+        _state['df'] = df
+        _state['mtime'] = mtime
+        logger.info(f"Published snapshot version {_state['version']}, rows: {len(df)}")
+        version = _state['version']
+    events.notify(version)
+    return version
+
+
+def get_snapshot() -> Tuple[Optional[str], Optional[pd.DataFrame]]:
+    """Return the current (version, DataFrame) pair.
+
+    The frame is shared between callers and must not be modified in place.
+    When nothing newer has been published in this process, the exported
+    snapshot is reloaded only if its modification time has changed; the
+    columnar export loads memory-mapped and needs no re-cleaning.
+    """
+    mtime = _csv_mtime()
+    with _lock:
+        if mtime is None or mtime == _state['mtime']:
+            metrics.incr('snapshot_cache_hits')
+            return _state['version'], _state['df']
+
+        metrics.incr('snapshot_reloads')
+        logger.info(f"Snapshot cache stale, reloading {mtime[0]}")
+        df = load_snapshot()
+        # Record the mtime even on failure so a bad file is not re-parsed every call
+        _state['mtime'] = mtime
+        if df is not None and not df.empty:
+            _state['version'] = _version(mtime)
+            _state['df'] = df
+            events.notify(_state['version'])
+        return _state['version'], _state['df']
+
+
+def _cached(cache: 'OrderedDict[Any, Any]', size: int, name: str, key: Any, build: Callable[[], Any]) -> Any:
+    with _payload_lock:
+        if key in cache:
+            cache.move_to_end(key)
+            metrics.incr(f'{name}_hits')
+            return cache[key]
+
+    metrics.incr(f'{name}_misses')
+
+    payload = build()
+    with _payload_lock:
+        cache[key] = payload
+        cache.move_to_end(key)
+        while len(cache) > size:
+            cache.popitem(last=False)
+    return payload
+
+
+def get_payload(key: str, build: Callable[[], Any]) -> Any:
+    """Return the rendered payload for a data version, building it on a miss.
+
+    Payloads are kept in a small LRU bounded by CONFIG['dashboard']['payload_cache_size'].
+    """
+    return _cached(_payloads, CONFIG['dashboard']['payload_cache_size'], 'payload_cache', key, build)
+
+
+def get_history_payload(key: str, build: Callable[[], Any]) -> Any:
+    """Like get_payload, for history figures.
+
+    Kept in their own LRU, bounded by CONFIG['dashboard']['history_cache_size'],
+    so browsing date ranges can't evict the snapshot payloads.
+    """
+    return _cached(_history_payloads, CONFIG['dashboard']['history_cache_size'], 'history_cache', key, build)
+
+
+def get_history_frame(key: Any, build: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    """Like get_payload, for history scans behind the table's history backend.
+
+    Callers key by history_version() and the read bounds, and must not
+    modify the frame. Bounded by CONFIG['dashboard']['table_history_cache_size'].
+    """
+    return _cached(_history_frames, CONFIG['dashboard']['table_history_cache_size'], 'history_frame_cache', key, build)
@@ -0,0 +1,181 @@
+# src/cdc.py
+
+import os
+import json
+import threading
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from config.settings import CONFIG
+from src import metrics
+from src.schema import SNAPSHOT_SCHEMA, widen_float32
+
+logger = logging.getLogger(__name__)
+
+KEY = 'commodity'
+# Compared between snapshots; the scrape timestamp alone never counts as a change
+VALUE_COLUMNS = [c for c in SNAPSHOT_SCHEMA if c not in (KEY, 'timestamp')]
+NUMERIC_COLUMNS = [c for c in VALUE_COLUMNS if SNAPSHOT_SCHEMA[c].startswith('float')]
+CHANGE_COLUMNS = (['op', KEY, 'timestamp', 'previous_timestamp'] + VALUE_COLUMNS
+                  + [f'{c}_delta' for c in NUMERIC_COLUMNS])
+
+_previous: Optional[pd.DataFrame] = None
+_lock = threading.Lock()
+
+
+def _comparable(df: pd.DataFrame) -> pd.DataFrame:
+    """Key and value columns with categoricals as plain objects, one row per commodity."""
+    df = df[[c for c in [KEY, 'timestamp'] + VALUE_COLUMNS if c in df.columns]].copy()
+    for col in df.select_dtypes('category').columns:
+        df[col] = df[col].astype(object)
+    for col in VALUE_COLUMNS + ['timestamp']:
+        if col not in df.columns:
+            df[col] = np.nan
+    return df.dropna(subset=[KEY]).drop_duplicates(subset=[KEY], keep='last')
+
+
+def diff_snapshots(previous: Optional[pd.DataFrame], current: pd.DataFrame) -> pd.DataFrame:
+    """Rows inserted, removed or changed between two snapshots, joined on commodity.
+
+    Each change carries the current values (the last known ones for
+    deletes) and the numeric deltas against the previous snapshot.
+    """
+    current = _comparable(current)
+    previous = _comparable(previous) if previous is not None else current.iloc[0:0]
+    merged = current.merge(previous, on=KEY, how='outer', suffixes=('', '_prev'), indicator=True)
+
+    changed = np.zeros(len(merged), dtype=bool)
+    for col in VALUE_COLUMNS:
+        new, old = merged[col], merged[f'{col}_prev']
+        changed |= ~(new.eq(old) | (new.isna() & old.isna())).to_numpy()
+    side = merged['_merge'].to_numpy()
+    op = np.select(
+        [side == 'left_only', side == 'right_only', changed],
+        ['insert', 'delete', 'update'],
+        default=''
+    )
+    merged = merged[op != '']
+    op = op[op != '']
+    if not len(merged):
+        return pd.DataFrame(columns=CHANGE_COLUMNS)
+
+    deleted = op == 'delete'
+    changes = pd.DataFrame({'op': op, KEY: merged[KEY].to_numpy()})
+    changes['timestamp'] = merged['timestamp'].where(~deleted, current['timestamp'].max()).to_numpy()
+    changes['previous_timestamp'] = merged['timestamp_prev'].to_numpy()
+    for col in VALUE_COLUMNS:
+        changes[col] = merged[col].where(~deleted, merged[f'{col}_prev']).to_numpy()
+    for col in NUMERIC_COLUMNS:
+        dtype = SNAPSHOT_SCHEMA[col]
+        changes[col] = changes[col].astype(dtype)
+        changes[f'{col}_delta'] = (
+            pd.to_numeric(merged[col], errors='coerce') - pd.to_numeric(merged[f'{col}_prev'], errors='coerce')
+        ).to_numpy().astype(dtype)
+    return changes[CHANGE_COLUMNS]
+
+
+def _json_value(value: Any) -> Any:
+    if value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NaT:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _append_stream(changes: pd.DataFrame) -> None:
+    """Append one JSON line per change to the stream file."""
+    changes = widen_float32(changes)
+    lines = [
+        json.dumps({col: _json_value(value) for col, value in record.items()})
+        for record in changes.astype(object).to_dict('records')
+    ]
+    with open(CONFIG['cdc']['stream_file'], 'a') as f:
+        f.write(''.join(f"{line}\n" for line in lines))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def bootstrap_cdc(df: Optional[pd.DataFrame]) -> None:
+    """Seed the previous snapshot, e.g. from the last export, so a restart does not re-emit everything."""
+    global _previous
+    if df is not None and not df.empty:
+        with _lock:
+            _previous = df
+        logger.info(f"Change capture seeded with {len(df)} rows")
+
+
+def capture_changes(df: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """Diff a cleaned snapshot against the previous one.
+
+    Returns the changes, or None when the diff failed and sinks should
+    write the full snapshot. Nothing is published until commit_changes.
+    """
+    if not CONFIG['cdc']['enabled']:
+        return None
+    if df is None or df.empty:
+        logger.warning("No data for change capture")
+        return None
+    try:
+        with metrics.timer('cdc_diff_seconds'), _lock:
+            changes = diff_snapshots(_previous, df)
+        logger.info(f"Captured {len(changes)} changes from {len(df)} rows")
+        return changes
+    except Exception as e:
+        logger.error(f"Error capturing changes: {e}")
+        return None
+
+
+def commit_changes(df: pd.DataFrame, changes: Optional[pd.DataFrame]) -> bool:
+    """Publish the changes and make df the baseline of the next diff.
+
+    Call only once the sinks hold df: until then the next run diffs
+    against the old baseline again, so changes a failed load missed are
+    captured and written later instead of being lost. Returns False when
+    the changes could not be published.
+    """
+    global _previous
+    if changes is None:
+        # No diff to publish; the baseline stays as is
+        return True
+    try:
+        with _lock:
+            if not changes.empty:
+                _append_stream(changes)
+            _previous = df
+        for op, count in changes['op'].value_counts().items():
+            metrics.incr('changes', int(count), op=op)
+        return True
+    except Exception as e:
+        logger.error(f"Error committing changes: {e}")
+        return False
+
+
+def delta_rows(df: pd.DataFrame, changes: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """Rows of df that were inserted or changed; all of df when there is no diff."""
+    if changes is None:
+        return df
+    moved = changes.loc[changes['op'] != 'delete', KEY]
+    return df[df[KEY].astype(object).isin(moved)]
+
+
+def read_changes(offset: int = 0, limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """Read changes from a byte offset of the stream file.
+
+    Returns the changes and the offset to resume from; consumers keep the
+    offset to receive each change once.
+    """
+    path = CONFIG['cdc']['stream_file']
+    if not os.path.exists(path):
+        return [], 0
+    records = []
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for line in iter(f.readline, b''):
+            if not line.endswith(b'\n') or (limit is not None and len(records) >= limit):
+                break
+            records.append(json.loads(line))
+            offset += len(line)
+    return records, offset
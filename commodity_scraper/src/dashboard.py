@@ -1,24 +1,142 @@
 # src/dashboard.py
 
 import dash
-from dash import dcc, html, dash_table
-from dash.dependencies import Input, Output
+import flask
+from dash import dcc, html, dash_table, no_update
+from dash.dash_table import FormatTemplate
+from dash.dependencies import Input, Output, State
 import plotly.express as px
+import plotly.graph_objects as go
 import pandas as pd
-from typing import Tuple
+from typing import List, Optional, Tuple
 import logging
 from config.settings import CONFIG
-from src.data_processor import read_csv, clean_data
+from src import events, metrics
+from src.analytics import load_analytics
+from src.cache import get_snapshot, get_payload, get_history_payload
+from src.cdc import read_changes
+from src.database import read_latest_snapshot, pool_status
+from src.downsample import downsample
+from src.history import read_history
+from src.rollups import pick_frequency, read_rollups
+from src.runner import job_history, load_scraper_status
+from src.schema import PERCENT_COLUMNS
+from src.table_query import TABLE_COLUMNS, query_page
 
 logger = logging.getLogger(__name__)
 
-def create_dashboard() -> dash.Dash:
-    """Create and configure Dash dashboard."""
-    app = dash.Dash(__name__, external_stylesheets=[
-        'https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css'
-    ])
+def render_payload(df: Optional[pd.DataFrame]) -> Tuple:
+    """Build figure JSON and status for a snapshot."""
+    if df is None or df.empty:
+        logger.warning("No data for dashboard")
+        return (
+            px.bar(title="No data").to_dict(),
+            px.bar(title="No data").to_dict(),
+            "No data",
+            "No commodity data found in CSV or database.",
+            {'display': 'block'}
+        )
+    
+    if 'commodity' not in df.columns:
+        logger.error("Missing commodity column")
+        return (
+            px.bar(title="Data error").to_dict(),
+            px.bar(title="Data error").to_dict(),
+            "Error",
+            "Data error: missing commodity column.",
+            {'display': 'block'}
+        )
+    
+    # Filter agricultural commodities
+    agri_df = df[df['commodity'].str.lower().isin(CONFIG['agri_terms'])]
+    if agri_df.empty:
+        logger.warning("No agricultural commodities found")
+        # Still display data to avoid blank dashboard
+        error_msg = "No agricultural commodities found, showing all available data."
+    else:
+        df = agri_df
+        error_msg = ""
+    
+    price_fig = px.bar(
+        df, x='commodity', y='price',
+        title="Agricultural Commodity Prices",
+        labels={'commodity': 'Commodity', 'price': 'Price'},
+        template='plotly_white'
+    ).update_traces(marker_color='#1f77b4')
+    
+    change_fig = px.bar(
+        df, x='commodity', y='change',
+        title="Agricultural Price Changes",
+        labels={'commodity': 'Commodity', 'change': 'Change'}
+    ).update_layout(yaxis_tickformat='.2%').update_traces(
+        marker_color=['green' if x > 0 else 'red' for x in df['change']] if 'change' in df.columns else '#1f77b4'
+    )
+    
+    last_update = (
+        pd.to_datetime(df['timestamp']).max().strftime("%Y-%m-%d %H:%M:%S")
+        if 'timestamp' in df.columns and not df['timestamp'].isna().all()
+        else "Unknown"
+    )
+    
+    return (
+        price_fig.to_dict(),
+        change_fig.to_dict(),
+        f"Last Updated: {last_update}",
+        error_msg,
+        {'display': 'block' if error_msg else 'none'}
+    )
 
-    app.layout = html.Div([
+def render_history(commodities: List[str], start: Optional[str], end: Optional[str]) -> dict:
+    """Build the price history figure, downsampled per commodity before plotting."""
+    settings = CONFIG['dashboard']
+    # Long ranges are drawn from the rollups' closing prices, never the raw rows
+    frequency = pick_frequency(start, end, settings['history_points'])
+    if frequency is None:
+        df = read_history(start, end, commodities or None, columns=['price'])
+    else:
+        df = read_rollups(frequency, start, end, commodities or None)
+        df = df.rename(columns={'bucket': 'timestamp', 'close': 'price'})
+    if df.empty:
+        return px.line(title="No history for this range").to_dict()
+
+    points = downsample(df, settings['history_points'], method=settings['history_downsample'])
+    logger.info(f"History chart: {len(df)} {frequency or 'raw'} rows downsampled to {len(points)}")
+    # One WebGL trace per commodity straight from the downsampled arrays
+    fig = go.Figure(layout=dict(
+        title=f"Price History ({frequency} close)" if frequency else "Price History", template='plotly_white',
+        xaxis_title="Time", yaxis_title="Price", legend_title="Commodity"
+    ))
+    for commodity, series in points.groupby('commodity', sort=True, observed=True):
+        fig.add_trace(go.Scattergl(
+            x=series['timestamp'].to_numpy(), y=series['price'].to_numpy(), mode='lines', name=str(commodity)
+        ))
+    return fig.to_dict()
+
+# Opens one EventSource per page and returns the pushed snapshot version when it
+# changes; runs in the browser on a client-only interval, so idle pages make no requests
+PUSH_LISTENER = """
+function(n) {
+    var push = window.commodityPush;
+    if (!push) {
+        push = window.commodityPush = {version: null, seen: null};
+        var source = new EventSource('/events');
+        source.addEventListener('version', function(e) {
+            push.version = JSON.parse(e.data).version;
+        });
+    }
+    if (push.version === null || push.version === push.seen) {
+        return window.dash_clientside.no_update;
+    }
+    push.seen = push.version;
+    return push.version;
+}
+"""
+
+def serve_layout() -> html.Div:
+    """Build the page layout; Dash calls this on every page load."""
+    # Computed per load, so long-running workers don't pin the default range to their start day
+    today = pd.Timestamp.now().normalize()
+    return html.Div([
         html.H1("Agricultural Commodities Dashboard", className="text-center mb-4"),
         html.Div(
             id='error-message',
@@ -31,118 +149,215 @@ def create_dashboard() -> dash.Dash:
         ], className="d-flex justify-content-center align-items-center"),
         dcc.Graph(id='price-chart'),
         dcc.Graph(id='change-chart'),
+        html.H3("Price History", className="mt-4"),
+        html.Div([
+            dcc.Dropdown(id='history-commodities', multi=True, placeholder="All commodities",
+                         className="flex-grow-1 me-3"),
+            dcc.DatePickerRange(
+                id='history-range',
+                start_date=(today - pd.Timedelta(days=CONFIG['dashboard']['history_days'])).date(),
+                end_date=today.date()
+            )
+        ], className="d-flex align-items-center"),
+        dcc.Graph(id='history-chart'),
         html.H3("Commodity Data", className="mt-4"),
         dash_table.DataTable(
             id='data-table',
-            columns=[],
+            columns=[
+                {'name': col.title(), 'id': col, 'type': 'numeric', 'format': FormatTemplate.percentage(2)}
+                if col in PERCENT_COLUMNS else {'name': col.title(), 'id': col}
+                for col in TABLE_COLUMNS
+            ],
             data=[],
             style_table={'overflowX': 'auto'},
             style_cell={'padding': '5px', 'textAlign': 'left'},
             style_header={'fontWeight': 'bold'},
-            page_size=10
+            page_current=0,
+            page_size=CONFIG['dashboard']['page_size'],
+            page_action='custom',
+            filter_action='custom',
+            filter_query='',
+            sort_action='custom',
+            sort_mode='multi',
+            sort_by=[]
         ),
-        dcc.Interval(id='interval-component', interval=30*60*1000, n_intervals=0)
+        dcc.Store(id='client-version'),
+        dcc.Store(id='server-version'),
+        dcc.Interval(id='push-check', interval=CONFIG['dashboard']['push_check_ms'], n_intervals=0)
     ], className="container p-4")
 
+def create_dashboard() -> dash.Dash:
+    """Create and configure Dash dashboard."""
+    app = dash.Dash(__name__, external_stylesheets=[
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css'
+    ])
+
+    app.layout = serve_layout
+
+    @app.server.route('/db/pool')
+    def db_pool():
+        return flask.jsonify(pool_status())
+
+    @app.server.route('/events')
+    def push_events():
+        last_seen = flask.request.headers.get('Last-Event-ID')
+        return flask.Response(
+            events.event_stream(last_seen, poll=get_snapshot),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+
+    app.clientside_callback(
+        PUSH_LISTENER,
+        Output('server-version', 'data'),
+        Input('push-check', 'n_intervals')
+    )
+
+    @app.server.route('/metrics')
+    def prometheus_metrics():
+        for name, value in pool_status().items():
+            if isinstance(value, (int, float)):
+                metrics.set_gauge('db_pool', value, stat=name)
+        return flask.Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+    # In serve mode the runner lives in the scrape process, so its job history and
+    # pipeline metrics come from the status file it exports after every run
+    @app.server.route('/metrics/scraper')
+    def scraper_metrics():
+        status = load_scraper_status()
+        if status is None:
+            return flask.Response("# no scraper status exported yet\n", status=404, mimetype='text/plain')
+        return flask.Response(status['metrics'], mimetype='text/plain; version=0.0.4')
+
+    @app.server.route('/jobs')
+    def jobs():
+        history = job_history()
+        if history is None:
+            status = load_scraper_status()
+            history = status['jobs'] if status is not None else {}
+        return flask.jsonify(history)
+
+    @app.server.route('/api/analytics')
+    def analytics():
+        data = load_analytics()
+        if data is None:
+            return flask.jsonify({'error': 'No analytics available'}), 404
+        window = flask.request.args.get('window')
+        commodity = flask.request.args.get('commodity')
+        data['results'] = [
+            r for r in data['results']
+            if (window is None or r['window'] == window)
+            and (commodity is None or r['commodity'] == commodity)
+        ]
+        return flask.jsonify(data)
+
+    @app.server.route('/api/changes')
+    def changes():
+        try:
+            offset = int(flask.request.args.get('offset', 0))
+            limit = int(flask.request.args.get('limit', 1000))
+        except ValueError:
+            return flask.jsonify({'error': 'offset and limit must be integers'}), 400
+        records, next_offset = read_changes(offset, limit)
+        return flask.jsonify({'changes': records, 'offset': next_offset})
+
+    @app.server.route('/api/rollups/<frequency>')
+    def rollups(frequency: str):
+        if frequency not in CONFIG['rollups']['frequencies']:
+            return flask.jsonify({'error': f"Unknown rollup {frequency}"}), 404
+        args = flask.request.args
+        commodities = args.getlist('commodity') or None
+        try:
+            df = read_rollups(frequency, args.get('start'), args.get('end'), commodities)
+        except ValueError as e:
+            return flask.jsonify({'error': str(e)}), 400
+        return flask.Response(df.to_json(orient='records', date_format='iso'), mimetype='application/json')
+
     @app.callback(
         [
             Output('price-chart', 'figure'),
             Output('change-chart', 'figure'),
             Output('last-update-time', 'children'),
-            Output('data-table', 'columns'),
-            Output('data-table', 'data'),
             Output('error-message', 'children'),
-            Output('error-message', 'style')
+            Output('error-message', 'style'),
+            Output('client-version', 'data')
         ],
         [
-            Input('interval-component', 'n_intervals'),
+            Input('server-version', 'data'),
             Input('refresh-button', 'n_clicks')
-        ]
+        ],
+        [State('client-version', 'data')]
     )
-    def update_dashboard(n_intervals: int, n_clicks: int) -> Tuple:
-        df = read_csv()
-        if df is None or df.empty:
-            logger.warning("No data for dashboard")
-            return (
-                px.bar(title="No data"),
-                px.bar(title="No data"),
-                "No data",
-                [],
-                [],
-                "No commodity data found in CSV.",
-                {'display': 'block'}
-            )
-        
-        df = clean_data(df)
+    @metrics.timer('callback_seconds', callback='update_dashboard')
+    def update_dashboard(server_version: Optional[str], n_clicks: int, client_version: Optional[str]) -> Tuple:
+        version, df = get_snapshot()
         if df is None or df.empty:
-            logger.warning("No cleaned data for dashboard")
-            return (
-                px.bar(title="No data"),
-                px.bar(title="No data"),
-                "No data",
-                [],
-                [],
-                "Failed to process commodity data. Check logs for details.",
-                {'display': 'block'}
-            )
-        
-        if 'commodity' not in df.columns:
-            logger.error("Missing commodity column")
-            return (
-                px.bar(title="Data error"),
-                px.bar(title="Data error"),
-                "Error",
-                [],
-                [],
-                "Data error: missing commodity column.",
-                {'display': 'block'}
+            df = read_latest_snapshot()
+            version = (
+                f"db-{df['timestamp'].max()}" if df is not None and 'timestamp' in df.columns else None
             )
-        
-        # Filter agricultural commodities
-        if 'commodity' in df.columns:
-            agri_df = df[df['commodity'].str.lower().isin(CONFIG['agri_terms'])]
-            if agri_df.empty:
-                logger.warning("No agricultural commodities found")
-                # Still display data to avoid blank dashboard
-                error_msg = "No agricultural commodities found, showing all available data."
-            else:
-                df = agri_df
-                error_msg = ""
+        if version is not None and str(version) == client_version:
+            # Client already renders this data version
+            return (no_update,) * 6
+
+        if version is None:
+            payload = render_payload(df)
         else:
-            error_msg = "Commodity column missing."
-        
-        price_fig = px.bar(
-            df, x='commodity', y='price',
-            title="Agricultural Commodity Prices",
-            labels={'commodity': 'Commodity', 'price': 'Price'},
-            template='plotly_white'
-        ).update_traces(marker_color='#1f77b4')
-        
-        change_fig = px.bar(
-            df, x='commodity', y='change',
-            title="Agricultural Price Changes",
-            labels={'commodity': 'Commodity', 'change': 'Change'}
-        ).update_layout(yaxis_tickformat='.2%').update_traces(
-            marker_color=['green' if x > 0 else 'red' for x in df['change']] if 'change' in df.columns else '#1f77b4'
-        )
-        
-        last_update = (
-            df['timestamp'].max().strftime("%Y-%m-%d %H:%M:%S")
-            if 'timestamp' in df.columns and not df['timestamp'].isna().all()
-            else "Unknown"
-        )
-        
-        table_columns = [{'name': col.title(), 'id': col} for col in df.columns]
-        table_data = df.fillna('-').to_dict('records')  # Replace NaN for display
-        
-        return (
-            price_fig,
-            change_fig,
-            f"Last Updated: {last_update}",
-            table_columns,
-            table_data,
-            error_msg,
-            {'display': 'block' if error_msg else 'none'}
-        )
+            payload = get_payload(str(version), lambda: render_payload(df))
+        return payload + (str(version) if version is not None else None,)
+    
+    @app.callback(
+        Output('history-commodities', 'options'),
+        Input('client-version', 'data')
+    )
+    def update_history_options(version: Optional[str]) -> list:
+        _, df = get_snapshot()
+        if df is None or 'commodity' not in df.columns:
+            return no_update
+        return sorted(df['commodity'].dropna().unique())
+
+    @app.callback(
+        Output('history-chart', 'figure'),
+        [
+            Input('history-commodities', 'value'),
+            Input('history-range', 'start_date'),
+            Input('history-range', 'end_date'),
+            Input('client-version', 'data')
+        ]
+    )
+    @metrics.timer('callback_seconds', callback='update_history')
+    def update_history(commodities: Optional[List[str]], start: Optional[str], end: Optional[str],
+                       version: Optional[str]) -> dict:
+        commodities = sorted(commodities or [])
+        # End dates are whole days
+        end = f"{end} 23:59:59" if end else None
+        key = f"history:{version}:{','.join(commodities)}:{start}:{end}"
+        try:
+            return get_history_payload(key, lambda: render_history(commodities, start, end))
+        except Exception as e:
+            logger.error(f"Error building history chart: {e}")
+            return px.line(title="History unavailable").to_dict()
+
+    @app.callback(
+        [
+            Output('data-table', 'data'),
+            Output('data-table', 'page_count')
+        ],
+        [
+            Input('data-table', 'page_current'),
+            Input('data-table', 'page_size'),
+            Input('data-table', 'sort_by'),
+            Input('data-table', 'filter_query'),
+            Input('client-version', 'data')
+        ]
+    )
+    @metrics.timer('callback_seconds', callback='update_table')
+    def update_table(page_current: int, page_size: int, sort_by: list, filter_query: str, version: Optional[str]) -> Tuple:
+        try:
+            records, total = query_page(filter_query, sort_by, page_current, page_size)
+        except Exception as e:
+            logger.error(f"Error querying commodity table: {e}")
+            return [], 1
+        return records, max(1, -(-total // page_size))
     
     return app
\ No newline at end of file
@@ -1,29 +1,115 @@
 # src/data_processor.py
 
+import os
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
 from typing import Optional
-import os
 import logging
 from config.settings import CONFIG
+from src import metrics
+from src.files import atomic_write
+from src.logging_setup import lazy_frame
+from src.schema import ARROW_SCHEMA, SNAPSHOT_SCHEMA, enforce_schema
 
 logger = logging.getLogger(__name__)
 
-def save_to_csv(df: Optional[pd.DataFrame]) -> None:
-    """Save DataFrame to CSV."""
-    if df is not None and not df.empty:
-        df.to_csv(CONFIG['csv_file'], index=False)
-        logger.info(f"Data saved to {CONFIG['csv_file']}, rows: {len(df)}")
-    else:
+def _export_paths() -> dict:
+    export = CONFIG['export']
+    return {'csv': CONFIG['csv_file'], 'feather': export['feather_file'], 'parquet': export['parquet_file']}
+
+def _arrow_table(df: pd.DataFrame) -> pa.Table:
+    df = enforce_schema(df)
+    # Columns the scraped table lacked are exported as typed nulls
+    for col, dtype in SNAPSHOT_SCHEMA.items():
+        if col not in df.columns:
+            df[col] = pd.Series(index=df.index, dtype=dtype)
+    df = df[list(SNAPSHOT_SCHEMA)]
+    return pa.Table.from_pandas(df, schema=ARROW_SCHEMA, preserve_index=False)
+
+@metrics.timer('save_csv_seconds')
+def save_to_csv(df: Optional[pd.DataFrame]) -> bool:
+    """Export the snapshot in every configured format, each file replaced atomically.
+
+    Returns False when any format failed to write.
+    """
+    if df is None or df.empty:
         logger.warning("No data to save to CSV")
+        return False
+    paths = _export_paths()
+    saved = True
+    for fmt in CONFIG['export']['formats']:
+        try:
+            if fmt == 'csv':
+                atomic_write(paths[fmt], lambda tmp: df.to_csv(tmp, index=False))
+            elif fmt == 'feather':
+                # Uncompressed so readers can memory-map it without decoding
+                table = _arrow_table(df)
+                atomic_write(paths[fmt], lambda tmp: feather.write_feather(table, tmp, compression='uncompressed'))
+            elif fmt == 'parquet':
+                table = _arrow_table(df)
+                atomic_write(paths[fmt], lambda tmp: pq.write_table(table, tmp))
+            else:
+                logger.error(f"Unknown export format: {fmt}")
+                continue
+            logger.info(f"Data saved to {paths[fmt]}, rows: {len(df)}")
+        except Exception as e:
+            logger.error(f"Error saving {fmt} export: {e}")
+            saved = False
+    metrics.incr('rows', len(df), stage='csv')
+    return saved
+
+def save_details(df: Optional[pd.DataFrame]) -> None:
+    """Save the commodity detail snapshot to Parquet."""
+    if df is None or df.empty:
+        return
+    try:
+        df.to_parquet(CONFIG['detail']['path'], index=False)
+        logger.info(f"Details saved to {CONFIG['detail']['path']}, rows: {len(df)}")
+    except Exception as e:
+        logger.error(f"Error saving details: {e}")
+
+def snapshot_path() -> Optional[str]:
+    """Return the exported snapshot file to load, preferring columnar formats.
+
+    A columnar file older than the CSV is skipped: its last export failed
+    and it holds an earlier snapshot.
+    """
+    paths = _export_paths()
+    csv_mtime = os.stat(paths['csv']).st_mtime_ns if os.path.exists(paths['csv']) else None
+    for fmt in ('feather', 'parquet'):
+        if fmt in CONFIG['export']['formats'] and os.path.exists(paths[fmt]):
+            if csv_mtime is None or os.stat(paths[fmt]).st_mtime_ns >= csv_mtime:
+                return paths[fmt]
+    return paths['csv'] if csv_mtime is not None else None
 
-def read_csv() -> Optional[pd.DataFrame]:
-    """Read data from CSV."""
+def read_csv(path: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """Read the exported snapshot; Feather and Parquet files are memory-mapped."""
+    path = path or snapshot_path()
     try:
-        return pd.read_csv(CONFIG['csv_file'])
+        if path is None:
+            raise FileNotFoundError
+        if path.endswith('.feather'):
+            # split_blocks keeps null-free numeric columns as views on the mapped file
+            return feather.read_table(path, memory_map=True).to_pandas(split_blocks=True)
+        if path.endswith('.parquet'):
+            return pq.read_table(path, memory_map=True).to_pandas()
+        return pd.read_csv(path)
     except FileNotFoundError:
         logger.warning("CSV file not found")
         return None
 
+def load_snapshot() -> Optional[pd.DataFrame]:
+    """Load the last exported snapshot ready for use; only CSV needs cleaning."""
+    path = snapshot_path()
+    df = read_csv(path)
+    if df is not None and path == CONFIG['csv_file']:
+        return clean_data(df)
+    return df
+
+@metrics.timer('clean_data_seconds')
 def clean_data(df: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
     """Clean and transform DataFrame."""
     if df is None or df.empty:
@@ -31,112 +117,77 @@ def clean_data(df: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
         return None
 
     try:
-        logger.debug(f"Raw DataFrame shape: {df.shape}")
-        logger.debug(f"Raw columns: {df.columns.tolist()}")
-        logger.debug(f"Raw sample:\n{df.head(2).to_string()}")
-        
-        # Standardize column names
-        df.columns = [str(col).strip().replace(' ', '_').replace('%', 'percent').lower() for col in df.columns]
-        logger.debug(f"Standardized columns: {df.columns.tolist()}")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(f"Raw DataFrame shape: {df.shape}")
+            logger.debug(f"Raw columns: {df.columns.tolist()}")
+            logger.debug("Raw sample:\n%s", lazy_frame(df, 2))
         
-        # Dynamic column mapping
-        col_map = {}
-        for col in df.columns:
-            col_lower = col.lower()
-            if any(k in col_lower for k in ['commodity', 'name', 'item']):
-                col_map[col] = 'commodity'
-            elif 'price' in col_lower:
-                col_map[col] = 'price'
-            elif any(k in col_lower for k in ['change', 'chg', 'percent']):
-                col_map[col] = 'change'
-        
-        # Ensure commodity column
-        if not col_map.get('commodity') and len(df.columns) > 0:
-            col_map[df.columns[0]] = 'commodity'
-        df = df.rename(columns=col_map)
-        logger.debug(f"Renamed columns: {df.columns.tolist()}")
+        # Canonical names and typed columns; percent strings become fractions
+        df = enforce_schema(df)
+        if debug:
+            logger.debug(f"Typed columns: {df.dtypes.to_dict()}")
         
         # Initialize missing columns
-        for col in ['commodity', 'price', 'change']:
-            if col not in df.columns:
-                df[col] = pd.NA
-                logger.warning(f"Added missing column: {col}")
+        if 'commodity' not in df.columns:
+            logger.warning("Added missing column: commodity")
+            df['commodity'] = pd.Series(pd.NA, index=df.index, dtype='category')
+        if 'price' not in df.columns:
+            logger.warning("Added missing column: price")
+            df['price'] = np.nan
+        if 'change' not in df.columns:
+            logger.warning("Added missing column: change")
+            df['change'] = np.float32(0)
         
         # Drop rows with missing commodity
-        if 'commodity' in df.columns:
-            df = df.dropna(subset=['commodity'])
-            logger.debug(f"After dropping missing commodities, shape: {df.shape}")
+        df = df.dropna(subset=['commodity'])
         if df.empty:
             logger.warning("No valid data after dropping missing commodities")
             return None
         
-        # Clean price
-        if 'price' in df.columns:
-            try:
-                df['price'] = (
-                    df['price'].astype(str)
-                    .str.replace(',', '', regex=False)
-                    .str.replace('$', '', regex=False)
-                    .str.replace('[^0-9.-]', '', regex=True)
-                    .str.strip()
-                    .pipe(pd.to_numeric, errors='coerce')
-                )
-                # Instead of dropping, fill invalid prices with NaN
-                invalid_prices = df['price'].isna() | (df['price'] <= 0)
-                if invalid_prices.any():
-                    logger.warning(f"Found {invalid_prices.sum()} invalid prices, filling with NaN")
-                    df.loc[invalid_prices, 'price'] = pd.NA
-                logger.debug(f"Price column stats: {df['price'].describe().to_dict()}")
-            except Exception as e:
-                logger.error(f"Error cleaning price column: {e}")
-                df['price'] = pd.NA
+        # Instead of dropping, fill invalid prices with NaN
+        invalid_prices = df['price'] <= 0
+        if invalid_prices.any():
+            df.loc[invalid_prices, 'price'] = np.nan
+        missing = df['price'].isna().sum()
+        if missing:
+            logger.warning(f"Found {missing} invalid prices, filling with NaN")
+        if debug:
+            logger.debug(f"Price column stats: {df['price'].describe().to_dict()}")
         
-        # Clean change
-        if 'change' in df.columns:
-            try:
-                df['change'] = (
-                    df['change'].astype(str)
-                    .str.replace('%', '', regex=False)
-                    .str.replace(',', '', regex=False)
-                    .str.strip()
-                    .pipe(pd.to_numeric, errors='coerce')
-                    .div(100)
-                    .clip(-1, 1)
-                )
-                # Fill missing changes with 0
-                df['change'] = df['change'].fillna(0)
-                logger.debug(f"Change column stats: {df['change'].describe().to_dict()}")
-            except Exception as e:
-                logger.error(f"Error cleaning change column: {e}")
-                df['change'] = 0
+        # Bound changes to +/-100% and treat missing as no change
+        df['change'] = df['change'].clip(-1, 1).fillna(0)
+        if debug:
+            logger.debug(f"Change column stats: {df['change'].describe().to_dict()}")
         
-        # Clean timestamp
+        # Fill unparseable timestamps
         if 'timestamp' in df.columns:
-            df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
             df['timestamp'] = df['timestamp'].fillna(pd.Timestamp.now())
         
         # Drop duplicates
         df = df.drop_duplicates()
-        logger.debug(f"After dropping duplicates, shape: {df.shape}")
+        if debug:
+            logger.debug(f"After dropping duplicates, shape: {df.shape}")
         
-        # Validate agricultural commodities
-        if 'commodity' in df.columns:
-            df['commodity_lower'] = df['commodity'].str.lower()
-            agri_count = df['commodity_lower'].isin(CONFIG['agri_terms']).sum()
-            df = df.drop(columns=['commodity_lower'])
-            logger.info(f"Found {agri_count} agricultural commodities")
-            # Relaxed constraint: warn but proceed with data
-            if agri_count < 1:
-                logger.warning(f"Low agricultural commodity count ({agri_count}), proceeding anyway")
+        # Validate agricultural commodities on category codes
+        commodity = df['commodity'].cat
+        is_agri = commodity.categories.str.lower().isin(CONFIG['agri_terms'])
+        agri_count = int(is_agri[commodity.codes].sum())
+        logger.info(f"Found {agri_count} agricultural commodities")
+        # Relaxed constraint: warn but proceed with data
+        if agri_count < 1:
+            logger.warning(f"Low agricultural commodity count ({agri_count}), proceeding anyway")
         
         if df.empty:
             logger.warning("DataFrame empty after cleaning")
             return None
         
+        metrics.incr('rows', len(df), stage='clean')
         logger.info(f"Cleaned DataFrame shape: {df.shape}")
         logger.info(f"Cleaned columns: {df.columns.tolist()}")
-        logger.debug(f"Cleaned sample:\n{df.head().to_string()}")
+        if debug:
+            logger.debug("Cleaned sample:\n%s", lazy_frame(df))
         return df
     except Exception as e:
         logger.error(f"Error cleaning data: {e}")
-        return None
\ No newline at end of file
+        return None
@@ -1,31 +1,304 @@
 # src/database.py
 
-from sqlalchemy import create_engine
+from sqlalchemy import (
+    create_engine, event, func, MetaData, Table, Column, Index, String, Float, DateTime, select
+)
+from sqlalchemy.engine import Engine, Connection, URL, make_url
 import pandas as pd
-from typing import Optional
+from typing import Optional, List, Dict, Any, Iterator
+from contextlib import contextmanager
+import threading
+import time
 import logging
 from config.settings import CONFIG
+from src import metrics
+from src.schema import enforce_schema, widen_float32
 
 logger = logging.getLogger(__name__)
 
-def load_to_mysql(df: Optional[pd.DataFrame]) -> None:
-    """Load DataFrame to MySQL."""
+metadata = MetaData()
+
+commodities_table = Table(
+    CONFIG['table_name'], metadata,
+    Column('commodity', String(128), primary_key=True),
+    Column('timestamp', DateTime, primary_key=True),
+    Column('price', Float),
+    Column('day', Float),
+    Column('change', Float),
+    Column('weekly', Float),
+    Column('monthly', Float),
+    Column('ytd', Float),
+    Column('yoy', Float),
+    Column('date', String(16)),
+    Column('unit', String(32)),
+    Column('currency', String(16)),
+    Index(f"ix_{CONFIG['table_name']}_timestamp", 'timestamp'),
+    Index(f"ix_{CONFIG['table_name']}_date", 'date'),
+)
+
+KEY_COLUMNS = ['commodity', 'timestamp']
+# Dialects _upsert_statement can build an insert-or-update for
+UPSERT_DIALECTS = ('mysql', 'sqlite', 'postgresql')
+VALUE_COLUMNS = [c.name for c in commodities_table.columns if c.name not in KEY_COLUMNS]
+
+_schema_ready = set()
+
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+_pool_metrics = {
+    'connects': 0,
+    'checkouts': 0,
+    'checkins': 0,
+    'invalidations': 0,
+    'waits': 0,
+    'wait_seconds_total': 0.0,
+    'wait_seconds_max': 0.0
+}
+_metrics_lock = threading.Lock()
+
+
+def _engine_url() -> Any:
+    """Build the database URL from CONFIG['db']; a literal 'url' entry wins."""
+    db = CONFIG['db']
+    if db.get('url'):
+        return db['url']
+    return URL.create(
+        'mysql+mysqlconnector',
+        username=db['user'],
+        password=db['password'],
+        host=db['host'],
+        database=db['database']
+    )
+
+
+def _count(name: str) -> None:
+    with _metrics_lock:
+        _pool_metrics[name] += 1
+
+
+def _register_pool_events(engine: Engine) -> None:
+    event.listen(engine, 'connect', lambda *args: _count('connects'))
+    event.listen(engine, 'checkout', lambda *args: _count('checkouts'))
+    event.listen(engine, 'checkin', lambda *args: _count('checkins'))
+    event.listen(engine, 'invalidate', lambda *args: _count('invalidations'))
+
+
+def _unsupported_dialect(dialect: str) -> ValueError:
+    return ValueError(f"Unsupported database dialect {dialect!r}, expected one of {UPSERT_DIALECTS}")
+
+
+def init_engine() -> Engine:
+    """Create the process-wide engine from CONFIG['db'] if it does not exist yet."""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            return _engine
+        url = _engine_url()
+        dialect = make_url(url).get_backend_name()
+        if dialect not in UPSERT_DIALECTS:
+            raise _unsupported_dialect(dialect)
+        pool = CONFIG['db'].get('pool', {})
+        kwargs = {'pool_pre_ping': pool.get('pre_ping', True)}
+        # In-memory SQLite uses a per-thread singleton pool without sizing options
+        if str(url) not in ('sqlite://', 'sqlite:///:memory:'):
+            kwargs.update(
+                pool_size=pool.get('size', 5),
+                max_overflow=pool.get('max_overflow', 10),
+                pool_timeout=pool.get('timeout', 30),
+                pool_recycle=pool.get('recycle', 1800)
+            )
+        _engine = create_engine(url, **kwargs)
+        _register_pool_events(_engine)
+        logger.info(f"Database engine created for {_engine.url.render_as_string(hide_password=True)}")
+        return _engine
+
+
+def get_engine() -> Engine:
+    """Return the shared engine, creating it on first use."""
+    return _engine if _engine is not None else init_engine()
+
+
+def dispose_engine() -> None:
+    """Close all pooled connections and drop the shared engine."""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+
+
+@contextmanager
+def db_connection(begin: bool = False) -> Iterator[Connection]:
+    """Check out a pooled connection, recording how long the checkout waited."""
+    engine = get_engine()
+    started = time.perf_counter()
+    conn = engine.connect()
+    waited = time.perf_counter() - started
+    with _metrics_lock:
+        _pool_metrics['waits'] += 1
+        _pool_metrics['wait_seconds_total'] += waited
+        _pool_metrics['wait_seconds_max'] = max(_pool_metrics['wait_seconds_max'], waited)
+    try:
+        if begin:
+            with conn.begin():
+                yield conn
+        else:
+            yield conn
+    finally:
+        conn.close()
+
+
+def pool_status() -> Dict[str, Any]:
+    """Return pool occupancy and checkout/wait counters for the shared engine."""
+    with _metrics_lock:
+        status = dict(_pool_metrics)
+    status['wait_seconds_avg'] = (
+        status['wait_seconds_total'] / status['waits'] if status['waits'] else 0.0
+    )
+    if _engine is not None:
+        pool = _engine.pool
+        for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+            if hasattr(pool, name):
+                status[f'pool_{name}'] = getattr(pool, name)()
+    return status
+
+
+def ensure_schema(engine: Engine) -> None:
+    """Create the commodity table and its indexes once per engine."""
+    if engine.url in _schema_ready:
+        return
+    metadata.create_all(engine, checkfirst=True)
+    _schema_ready.add(engine.url)
+
+
+def _upsert_statement(engine: Engine, rows: List[Dict[str, Any]]):
+    """Build a multi-row INSERT that updates value columns on key conflict."""
+    if engine.dialect.name == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(commodities_table).values(rows)
+        return stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in VALUE_COLUMNS})
+    if engine.dialect.name in ('sqlite', 'postgresql'):
+        if engine.dialect.name == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(commodities_table).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=KEY_COLUMNS,
+            set_={c: stmt.excluded[c] for c in VALUE_COLUMNS}
+        )
+    raise _unsupported_dialect(engine.dialect.name)
+
+
+def _prepare_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Restrict to table columns and coerce values to what the schema expects."""
+    df = widen_float32(df.copy())
+    for col in df.select_dtypes('category').columns:
+        df[col] = df[col].astype(object)
+    for col in commodities_table.columns.keys():
+        if col not in df.columns:
+            df[col] = None
+    df = df[commodities_table.columns.keys()]
+    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+    df = df.dropna(subset=KEY_COLUMNS).drop_duplicates(subset=KEY_COLUMNS, keep='last')
+    for col in VALUE_COLUMNS:
+        if isinstance(commodities_table.c[col].type, Float):
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+        else:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df.astype(object).where(df.notna(), None)
+
+
+def _changed_rows(conn, df: pd.DataFrame) -> pd.DataFrame:
+    """Drop rows whose stored values already equal the incoming ones."""
+    timestamps = list(pd.unique(df['timestamp']))
+    existing = pd.DataFrame(
+        conn.execute(
+            select(commodities_table).where(commodities_table.c.timestamp.in_(timestamps))
+        ).mappings().all(),
+        columns=commodities_table.columns.keys()
+    )
+    if existing.empty:
+        return df
+    existing['timestamp'] = pd.to_datetime(existing['timestamp'])
+    existing = existing.astype(object).where(existing.notna(), None)
+    merged = df.merge(existing, on=KEY_COLUMNS, how='left', suffixes=('', '_db'), indicator=True)
+    unchanged = merged['_merge'] == 'both'
+    for col in VALUE_COLUMNS:
+        unchanged &= merged[col].eq(merged[f'{col}_db']) | (merged[col].isna() & merged[f'{col}_db'].isna())
+    return df[(~unchanged).to_numpy()]
+
+
+@contextmanager
+def _transaction(engine: Engine) -> Iterator[Connection]:
+    if engine is _engine:
+        with db_connection(begin=True) as conn:
+            yield conn
+    else:
+        with engine.begin() as conn:
+            yield conn
+
+
+def read_latest_snapshot() -> Optional[pd.DataFrame]:
+    """Read the latest stored row of every commodity.
+
+    Only changed rows are written per scrape, so the newest snapshot is the
+    latest row per commodity rather than the rows at the newest timestamp.
+    """
+    try:
+        ensure_schema(get_engine())
+        latest = select(
+            commodities_table.c.commodity,
+            func.max(commodities_table.c.timestamp).label('timestamp')
+        ).group_by(commodities_table.c.commodity).subquery()
+        query = select(commodities_table).join(latest, (commodities_table.c.commodity == latest.c.commodity)
+                                               & (commodities_table.c.timestamp == latest.c.timestamp))
+        with db_connection() as conn:
+            df = pd.read_sql(query, conn)
+        return enforce_schema(df) if not df.empty else None
+    except Exception as e:
+        logger.error(f"Error reading snapshot from database: {e}")
+        return None
+
+
+def upsert_dataframe(
+    df: Optional[pd.DataFrame],
+    engine: Optional[Engine] = None,
+    batch_size: Optional[int] = None
+) -> int:
+    """Write new or changed rows with batched upserts inside one transaction.
+
+    Returns the number of rows written.
+    """
+    if df is None or df.empty:
+        return 0
+    if batch_size is None:
+        batch_size = CONFIG['db'].get('batch_size', 500)
+
+    engine = engine if engine is not None else get_engine()
+    ensure_schema(engine)
+    total = len(df)
+    df = _prepare_rows(df)
+    with metrics.timer('db_upsert_seconds'), _transaction(engine) as conn:
+        df = _changed_rows(conn, df)
+        rows = df.to_dict('records')
+        for i in range(0, len(rows), batch_size):
+            conn.execute(_upsert_statement(engine, rows[i:i + batch_size]))
+    metrics.incr('rows', len(rows), stage='db_written')
+    metrics.incr('rows', total - len(rows), stage='db_unchanged')
+    return len(rows)
+
+
+def load_to_mysql(df: Optional[pd.DataFrame]) -> Optional[int]:
+    """Load DataFrame to MySQL; returns the rows written, or None when the load failed."""
     if df is None or df.empty:
         logger.warning("No data to load to MySQL")
-        return
+        return 0
 
     try:
-        engine = create_engine(
-            f"mysql+mysqlconnector://DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'root123',
-    'database': 'commodities_db'
-}@"
-            f"{CONFIG['db']['host']}/{CONFIG['db']['database']}"
-        )
-        with engine.connect() as conn:
-            df.to_sql(CONFIG['table_name'], conn, if_exists='replace', index=False)
-        logger.info(f"Data loaded to MySQL, rows: {len(df)}")
+        written = upsert_dataframe(df)
+        logger.info(f"Data loaded to MySQL, rows written: {written}, unchanged: {len(df) - written}")
+        return written
     except Exception as e:
-        logger.error(f"Error loading to MySQL: {e}")
\ No newline at end of file
+        logger.error(f"Error loading to MySQL: {e}")
+        return None
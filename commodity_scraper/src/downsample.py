@@ -0,0 +1,121 @@
+# src/downsample.py
+
+import logging
+from typing import Callable, Dict
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# A selector takes concatenated x/y arrays, segment offsets and lengths (every
+# segment longer than n_out) and returns the global indices of the kept points
+Selector = Callable[[np.ndarray, np.ndarray, np.ndarray, np.ndarray, int], np.ndarray]
+
+
+def _segment_sums(values: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    cumulative = np.concatenate(([0.0], np.cumsum(values)))
+    return cumulative[hi] - cumulative[lo]
+
+
+def lttb_segments(x: np.ndarray, y: np.ndarray, offsets: np.ndarray, lengths: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets over many series at once.
+
+    Each series keeps its first and last point; each of the n_out - 2 buckets
+    in between keeps the point forming the largest triangle with the point
+    kept from the previous bucket and the mean of the next bucket. Buckets
+    are processed left to right, each step vectorized across all series.
+    """
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    buckets = n_out - 2
+    # Interior bucket edges per series, as global indices
+    edges = offsets[:, None] + 1 + (np.arange(buckets + 1)[None, :] * (lengths[:, None] - 2)) // buckets
+    lo, hi = edges[:, :-1], edges[:, 1:]
+    counts = hi - lo
+    last = offsets + lengths - 1
+    mean_x = np.column_stack([_segment_sums(x, lo, hi) / counts, x[last]])
+    mean_y = np.column_stack([_segment_sums(y, lo, hi) / counts, y[last]])
+
+    rows = np.arange(len(offsets))
+    selected = np.empty((len(offsets), n_out), dtype=np.int64)
+    selected[:, 0], selected[:, -1] = offsets, last
+    a = offsets.copy()
+    for i in range(buckets):
+        start, width = lo[:, i], counts[:, i]
+        idx = start[:, None] + np.arange(width.max())[None, :]
+        valid = idx < hi[:, i, None]
+        idx = np.where(valid, idx, start[:, None])
+        ax, ay = x[a][:, None], y[a][:, None]
+        area = np.abs((ax - mean_x[:, i + 1, None]) * (y[idx] - ay) - (ax - x[idx]) * (mean_y[:, i + 1, None] - ay))
+        area[~valid] = -1.0
+        a = idx[rows, np.argmax(area, axis=1)]
+        selected[:, i + 1] = a
+    return selected.ravel()
+
+
+def minmax_segments(x: np.ndarray, y: np.ndarray, offsets: np.ndarray, lengths: np.ndarray, n_out: int) -> np.ndarray:
+    """Min/max bucketing: the lowest and highest point of each of n_out / 2 buckets per series."""
+    buckets = max(n_out // 2, 1)
+    segment = np.repeat(np.arange(len(offsets)), lengths)
+    local = np.arange(len(segment)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    positions = np.repeat(offsets, lengths) + local
+    # Nondecreasing, since points are ordered by series and then x
+    bucket = segment * buckets + (local * buckets) // np.repeat(lengths, lengths)
+    starts = np.flatnonzero(np.concatenate(([True], np.diff(bucket) != 0)))
+    counts = np.diff(np.append(starts, len(bucket)))
+    values = y[positions]
+    kept = []
+    for extreme in (np.minimum, np.maximum):
+        hits = np.flatnonzero(values == np.repeat(extreme.reduceat(values, starts), counts))
+        # First hit of each bucket
+        first = hits[np.concatenate(([True], np.diff(bucket[hits]) != 0))]
+        kept.append(positions[first])
+    return np.unique(np.concatenate(kept))
+
+
+METHODS: Dict[str, Selector] = {
+    'lttb': lttb_segments,
+    'minmax': minmax_segments,
+}
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the n_out LTTB points of a single series."""
+    if n_out >= len(x) or n_out < 3:
+        return np.arange(len(x))
+    return lttb_segments(x, y, np.array([0]), np.array([len(x)]), n_out)
+
+
+def downsample(df: pd.DataFrame, n_out: int, method: str = 'lttb',
+               x: str = 'timestamp', y: str = 'price', by: str = 'commodity') -> pd.DataFrame:
+    """Reduce each series in df (grouped by `by`, ordered by x) to at most n_out points.
+
+    Works on flat NumPy arrays: one sort, one selector call for every series
+    that needs reducing and one final take.
+    """
+    select = METHODS[method]
+    xs = df[x].to_numpy()
+    if np.issubdtype(xs.dtype, np.datetime64):
+        xs = xs.astype('datetime64[ns]').astype(np.int64)
+    ys = df[y].to_numpy(dtype=np.float64, na_value=np.nan)
+    codes = pd.factorize(df[by])[0]
+    keep = np.flatnonzero(~np.isnan(ys) & (codes >= 0))
+    if len(keep) and np.all(np.diff(xs[keep]) >= 0):
+        # Already in time order (as read_history returns it): a stable sort on series codes suffices
+        order = keep[np.argsort(codes[keep].astype(np.int32), kind='stable')]
+    else:
+        order = keep[np.lexsort((xs[keep], codes[keep]))]
+    if not len(order):
+        return df.iloc[0:0]
+
+    sorted_codes = codes[order]
+    offsets = np.concatenate(([0], np.flatnonzero(np.diff(sorted_codes)) + 1))
+    lengths = np.diff(np.append(offsets, len(order)))
+    reduce = lengths > max(n_out, 3)
+
+    kept = [np.repeat(~reduce, lengths).nonzero()[0]]
+    if reduce.any():
+        kept.append(select(xs[order].astype(np.float64), ys[order], offsets[reduce], lengths[reduce], n_out))
+    positions = order[np.sort(np.concatenate(kept))]
+    logger.debug(f"Downsampled {len(order)} points to {len(positions)} with {method}")
+    return df.iloc[positions].reset_index(drop=True)
@@ -0,0 +1,82 @@
+# src/events.py
+
+import json
+import time
+import threading
+import logging
+from typing import Any, Callable, Iterator, Optional
+from config.settings import CONFIG
+from src import metrics
+
+logger = logging.getLogger(__name__)
+
+_condition = threading.Condition()
+_version: Optional[str] = None
+_watcher: Optional[threading.Thread] = None
+
+
+def notify(version: Any) -> None:
+    """Record a new snapshot version and wake every waiting client."""
+    global _version
+    with _condition:
+        if str(version) == _version:
+            return
+        _version = str(version)
+        _condition.notify_all()
+    metrics.incr('push_notifications')
+
+
+def current_version() -> Optional[str]:
+    return _version
+
+
+def _message(version: str) -> str:
+    return f"id: {version}\nevent: version\ndata: {json.dumps({'version': version})}\n\n"
+
+
+def _watch(poll: Callable[[], Any], interval: float) -> None:
+    while True:
+        try:
+            poll()
+        except Exception as e:
+            logger.error(f"Error polling for snapshot versions: {e}")
+        time.sleep(interval)
+
+
+def _ensure_watcher(poll: Callable[[], Any]) -> None:
+    """Start one poller per process, so clients wait instead of each polling."""
+    global _watcher
+    with _condition:
+        if _watcher is not None:
+            return
+        _watcher = threading.Thread(
+            target=_watch, args=(poll, CONFIG['dashboard']['push_poll_seconds']),
+            name='push-watcher', daemon=True
+        )
+        _watcher.start()
+
+
+def event_stream(last_seen: Optional[str] = None, poll: Optional[Callable[[], Any]] = None) -> Iterator[str]:
+    """Server-sent events long-poll: a 'version' event whenever the snapshot changes.
+
+    The response waits up to push_hold_seconds, then ends and the browser's
+    EventSource reconnects with its Last-Event-ID, so an idle tab makes one
+    request per hold. poll, if given, is run by a per-process watcher so
+    versions exported by another process wake the waiting clients.
+    """
+    if poll is not None:
+        _ensure_watcher(poll)
+    metrics.incr('push_checks')
+    deadline = time.monotonic() + CONFIG['dashboard']['push_hold_seconds']
+    yield f"retry: {CONFIG['dashboard']['push_retry_ms']}\n\n"
+    while True:
+        with _condition:
+            _condition.wait_for(
+                lambda: _version is not None and _version != last_seen,
+                timeout=max(deadline - time.monotonic(), 0)
+            )
+            version = _version
+        if version is None or version == last_seen:
+            return
+        last_seen = version
+        yield _message(version)
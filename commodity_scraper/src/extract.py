@@ -0,0 +1,65 @@
+# src/extract.py
+
+import re
+import logging
+from typing import Iterable, List, Optional, Tuple
+import lxml.html
+from lxml.html import HtmlElement
+from config.settings import CONFIG
+
+logger = logging.getLogger(__name__)
+
+_term_patterns = {}
+
+
+def agri_pattern(terms: Optional[Iterable[str]] = None) -> 're.Pattern':
+    """Return one compiled alternation of all agricultural terms, cached per term set."""
+    key = frozenset(terms if terms is not None else CONFIG['agri_terms'])
+    if key not in _term_patterns:
+        # Longest first so overlapping terms prefer the more specific match
+        alternation = '|'.join(re.escape(t) for t in sorted(key, key=len, reverse=True))
+        _term_patterns[key] = re.compile(alternation)
+    return _term_patterns[key]
+
+
+def parse_html(content: bytes) -> HtmlElement:
+    """Parse a page with lxml's C HTML parser."""
+    return lxml.html.fromstring(content)
+
+
+def tables_with_headings(root: HtmlElement) -> List[Tuple[HtmlElement, str]]:
+    """Pair every table with the text of the nearest preceding h2/h3, in one document pass."""
+    result = []
+    heading = ''
+    for el in root.iter('h2', 'h3', 'table'):
+        if el.tag == 'table':
+            result.append((el, heading))
+        else:
+            heading = el.text_content().strip().lower()
+    return result
+
+
+def count_agri_matches(table: HtmlElement, pattern: 're.Pattern') -> int:
+    """Count (row, term) matches, lowercasing each row's text exactly once."""
+    return sum(
+        len(set(pattern.findall(tr.text_content().lower())))
+        for tr in table.iter('tr')
+    )
+
+
+def extract_rows(table: HtmlElement) -> Tuple[List[str], List[List[str]]]:
+    """Return header texts and the stripped cell texts of every data row."""
+    headers = [th.text_content().strip() for th in table.iter('th')]
+    rows = []
+    for i, tr in enumerate(table.iter('tr')):
+        if i == 0:
+            continue
+        cells = [td.text_content().strip() for td in tr.iter('td')]
+        if cells:
+            rows.append(cells)
+    return headers, rows
+
+
+def table_html(table: HtmlElement) -> bytes:
+    """Serialize a table element, e.g. for hashing."""
+    return lxml.html.tostring(table)
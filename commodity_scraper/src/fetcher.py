@@ -0,0 +1,194 @@
+# src/fetcher.py
+
+import asyncio
+import json
+import random
+import threading
+import logging
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+import aiohttp
+from config.settings import CONFIG
+from src import metrics
+from src.files import atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_session: Optional[aiohttp.ClientSession] = None
+_lock = threading.Lock()
+_state_lock = threading.Lock()
+_state: Optional[Dict[str, Dict[str, Any]]] = None
+# Values staged by the current run, applied to _state only once its output is committed
+_pending: Dict[str, Dict[str, Any]] = {}
+
+
+class RetryableStatus(Exception):
+    """Raised for HTTP statuses that are worth retrying."""
+
+
+class Page(NamedTuple):
+    """Result of fetching one URL."""
+    content: Optional[bytes]
+    not_modified: bool = False
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+def get_url_state(url: str) -> Dict[str, Any]:
+    """Return the committed validators and content hashes for a URL."""
+    global _state
+    with _state_lock:
+        if _state is None:
+            try:
+                with open(CONFIG['fetch']['state_file']) as f:
+                    _state = json.load(f)
+            except (OSError, ValueError):
+                _state = {}
+        return dict(_state.get(url, {}))
+
+
+def update_url_state(url: str, **values: Any) -> None:
+    """Stage new validator or hash values for a URL.
+
+    Staged values are not seen by get_url_state until save_url_state
+    commits them, so a run whose output is dropped doesn't mark its pages
+    as already processed.
+    """
+    get_url_state(url)
+    with _state_lock:
+        _pending.setdefault(url, {}).update({k: v for k, v in values.items() if v is not None})
+
+
+def save_url_state() -> None:
+    """Commit the staged values and persist validators and hashes atomically."""
+    with _state_lock:
+        if _state is None:
+            return
+        for url, values in _pending.items():
+            _state.setdefault(url, {}).update(values)
+        _pending.clear()
+        atomic_write_text(CONFIG['fetch']['state_file'], json.dumps(_state, indent=2))
+
+
+def discard_url_state() -> None:
+    """Drop the values staged since the last save_url_state."""
+    with _state_lock:
+        _pending.clear()
+
+
+def _ensure_loop() -> asyncio.AbstractEventLoop:
+    """Start the background event loop that owns the shared HTTP session."""
+    global _loop
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='fetcher-loop', daemon=True).start()
+        return _loop
+
+
+async def _get_session() -> aiohttp.ClientSession:
+    """Return the keep-alive session, creating it on the loop thread on first use."""
+    global _session
+    if _session is None or _session.closed:
+        fetch = CONFIG['fetch']
+        connector = aiohttp.TCPConnector(
+            limit=fetch['max_connections'],
+            limit_per_host=fetch['per_host_limit'],
+            keepalive_timeout=fetch['keepalive_timeout']
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            headers={'User-Agent': CONFIG['user_agent']},
+            timeout=aiohttp.ClientTimeout(total=fetch['request_timeout'])
+        )
+    return _session
+
+
+async def _fetch_one(session: aiohttp.ClientSession, url: str, conditional: bool) -> Page:
+    """Fetch a URL, retrying transient failures with jittered exponential backoff."""
+    retries = CONFIG['fetch']['retries']
+    backoff = CONFIG['fetch']['backoff']
+    headers = {}
+    if conditional:
+        state = get_url_state(url)
+        if state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+        if state.get('last_modified'):
+            headers['If-Modified-Since'] = state['last_modified']
+    with metrics.timer('fetch_request_seconds'):
+        for attempt in range(retries + 1):
+            try:
+                async with session.get(url, headers=headers) as response:
+                    metrics.incr('fetch_responses', status=str(response.status))
+                    if response.status == 304:
+                        return Page(None, not_modified=True)
+                    if response.status in RETRY_STATUSES:
+                        raise RetryableStatus(f"HTTP {response.status}")
+                    response.raise_for_status()
+                    content = await response.read()
+                    metrics.incr('fetch_bytes', len(content))
+                    return Page(
+                        content,
+                        etag=response.headers.get('ETag'),
+                        last_modified=response.headers.get('Last-Modified')
+                    )
+            except (aiohttp.ClientError, asyncio.TimeoutError, RetryableStatus) as e:
+                if isinstance(e, aiohttp.ClientResponseError) or attempt == retries:
+                    metrics.incr('fetch_failures')
+                    logger.error(f"Error fetching {url}: {e}")
+                    return Page(None)
+                delay = random.uniform(0, backoff * 2 ** attempt)
+                logger.warning(f"Fetch of {url} failed ({e}), retry {attempt + 1} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+        return Page(None)
+
+
+async def _fetch_all(urls: Iterable[str], budget: float, conditional: bool) -> Dict[str, Page]:
+    session = await _get_session()
+    tasks = {
+        url: asyncio.ensure_future(_fetch_one(session, url, conditional))
+        for url in dict.fromkeys(urls)
+    }
+    if not tasks:
+        return {}
+    done, pending = await asyncio.wait(tasks.values(), timeout=budget)
+    for task in pending:
+        task.cancel()
+    if pending:
+        logger.warning(f"Fetch budget of {budget}s exhausted, {len(pending)} requests cancelled")
+    return {url: task.result() if task in done else Page(None) for url, task in tasks.items()}
+
+
+def fetch_pages(
+    urls: Iterable[str],
+    budget: Optional[float] = None,
+    conditional: bool = True
+) -> Dict[str, Page]:
+    """Fetch URLs concurrently over the shared session.
+
+    Returns a mapping of URL to Page. Content is None for failed, timed-out
+    or not-modified requests. When conditional, stored ETag/Last-Modified
+    validators are sent with each request. The whole call is bounded by the
+    budget in seconds.
+    """
+    if budget is None:
+        budget = CONFIG['fetch']['total_budget']
+    future = asyncio.run_coroutine_threadsafe(
+        _fetch_all(list(urls), budget, conditional), _ensure_loop()
+    )
+    return future.result()
+
+
+def close_fetcher() -> None:
+    """Close the shared session and stop the background loop."""
+    global _session, _loop
+    with _lock:
+        if _loop is None:
+            return
+        if _session is not None:
+            asyncio.run_coroutine_threadsafe(_session.close(), _loop).result()
+            _session = None
+        _loop.call_soon_threadsafe(_loop.stop)
+        _loop = None
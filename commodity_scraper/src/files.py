@@ -0,0 +1,27 @@
+# src/files.py
+
+import os
+from typing import Callable
+
+
+def atomic_write(path: str, write: Callable[[str], None]) -> None:
+    """Write via a temp file in the same directory and rename it into place.
+
+    `write` gets the temp path; the temp file is removed if writing or the
+    rename fails, so readers only ever see a complete file.
+    """
+    tmp_path = f"{path}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def atomic_write_text(path: str, text: str) -> None:
+    """Atomically replace a text file, e.g. a JSON state file."""
+    def write(tmp_path: str) -> None:
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+    atomic_write(path, write)
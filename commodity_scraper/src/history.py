@@ -0,0 +1,229 @@
+# src/history.py
+
+import os
+import time
+import threading
+import logging
+from datetime import date, datetime, timedelta
+from typing import Optional, List, Iterable, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from config.settings import CONFIG
+from src import metrics
+from src.files import atomic_write
+
+logger = logging.getLogger(__name__)
+
+KEY_COLUMNS = ['commodity', 'timestamp']
+COMPACTED_FILE = 'data.parquet'
+# Reads list the files again if compaction removes one mid-read
+READ_ATTEMPTS = 3
+
+_write_lock = threading.Lock()
+
+
+def _root() -> str:
+    return CONFIG['history']['path']
+
+
+def _partition_dir(day: date) -> str:
+    return os.path.join(_root(), day.isoformat())
+
+
+def _partition_files(day: date) -> List[str]:
+    path = _partition_dir(day)
+    if not os.path.isdir(path):
+        return []
+    return sorted(
+        os.path.join(path, name) for name in os.listdir(path)
+        if name.endswith('.parquet')
+    )
+
+
+def _partition_days(start: Optional[date] = None, end: Optional[date] = None) -> List[date]:
+    """List partition days on disk, pruned to [start, end]."""
+    if not os.path.isdir(_root()):
+        return []
+    days = []
+    for name in os.listdir(_root()):
+        try:
+            day = date.fromisoformat(name)
+        except ValueError:
+            continue
+        if (start is None or day >= start) and (end is None or day <= end):
+            days.append(day)
+    return sorted(days)
+
+
+def _read_keys(day: date) -> pd.DataFrame:
+    """Read only the key columns of an existing partition."""
+    frames = [pq.read_table(f, columns=KEY_COLUMNS).to_pandas() for f in _partition_files(day)]
+    if not frames:
+        return pd.DataFrame(columns=KEY_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _write_parquet(df: pd.DataFrame, path: str) -> None:
+    """Write a frame to Parquet atomically via a temp file."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    atomic_write(path, lambda tmp_path: pq.write_table(table, tmp_path))
+
+
+def append_history(df: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """Append a cleaned snapshot to the history store, skipping rows already stored.
+
+    Returns the rows that were actually written.
+    """
+    if df is None or df.empty:
+        logger.warning("No data to append to history")
+        return None
+    if not all(col in df.columns for col in KEY_COLUMNS):
+        logger.error(f"History append needs key columns {KEY_COLUMNS}")
+        return None
+
+    df = df.copy()
+    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+    df = df.dropna(subset=KEY_COLUMNS).drop_duplicates(subset=KEY_COLUMNS, keep='last')
+
+    written = []
+    with _write_lock:
+        for day, part in df.groupby(df['timestamp'].dt.date):
+            existing = _read_keys(day)
+            if not existing.empty:
+                merged = part.merge(existing, on=KEY_COLUMNS, how='left', indicator=True)
+                part = part[(merged['_merge'] == 'left_only').to_numpy()]
+            if part.empty:
+                continue
+            os.makedirs(_partition_dir(day), exist_ok=True)
+            name = f"part-{datetime.now().strftime('%H%M%S%f')}.parquet"
+            _write_parquet(part, os.path.join(_partition_dir(day), name))
+            written.append(part)
+
+    if not written:
+        logger.info("History unchanged, all rows already stored")
+        return df.iloc[0:0]
+    new_rows = pd.concat(written, ignore_index=True)
+    metrics.incr('rows', len(new_rows), stage='history')
+    logger.info(f"Appended {len(new_rows)} rows to history at {_root()}")
+    return new_rows
+
+
+def read_history(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    commodities: Optional[Iterable[str]] = None,
+    columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """Read history rows in [start, end] for the given commodities.
+
+    Only partitions overlapping the range are opened, and the commodity and
+    timestamp predicates are pushed down into the Parquet reader.
+    """
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+
+    filters = []
+    if start is not None:
+        filters.append(('timestamp', '>=', start.to_pydatetime()))
+    if end is not None:
+        filters.append(('timestamp', '<=', end.to_pydatetime()))
+    if commodities is not None:
+        filters.append(('commodity', 'in', list(commodities)))
+    if columns is not None:
+        columns = list(dict.fromkeys(KEY_COLUMNS + list(columns)))
+
+    for attempt in range(READ_ATTEMPTS):
+        days = _partition_days(
+            start.date() if start is not None else None,
+            end.date() if end is not None else None
+        )
+        paths = [path for day in days for path in _partition_files(day)]
+        if not paths:
+            return pd.DataFrame(columns=columns or KEY_COLUMNS)
+        try:
+            # One multi-threaded scan over every file and a single conversion to pandas
+            dataset = pq.ParquetDataset(paths, filters=filters or None)
+            # Columns the scraped tables never had are left out rather than failing the read
+            table = dataset.read(columns=[c for c in columns if c in dataset.schema.names] if columns else None)
+            break
+        except FileNotFoundError:
+            # Compaction removed part files after writing their merged file; list again
+            if attempt == READ_ATTEMPTS - 1:
+                raise
+            logger.debug("History partition compacted during read, retrying")
+    if not table.num_rows:
+        return pd.DataFrame(columns=columns or KEY_COLUMNS)
+    df = table.to_pandas()
+    # A partition being compacted may briefly hold both the parts and the merged file
+    df = df.drop_duplicates(subset=KEY_COLUMNS, keep='last')
+    return df.sort_values(KEY_COLUMNS[::-1], ignore_index=True)
+
+
+def history_version() -> Tuple[Tuple[str, int], ...]:
+    """Fingerprint of the store that changes whenever a partition gains, loses or replaces a file.
+
+    Costs one stat per partition directory, so it can key caches of reads.
+    """
+    if not os.path.isdir(_root()):
+        return ()
+    return tuple(sorted(
+        (entry.name, entry.stat().st_mtime_ns) for entry in os.scandir(_root()) if entry.is_dir()
+    ))
+
+
+def stored_days() -> List[date]:
+    """Days with a history partition on disk, oldest first."""
+    return _partition_days()
+
+
+def compact_history(older_than_days: Optional[int] = None) -> int:
+    """Merge the part files of old partitions into one deduplicated file per day.
+
+    Returns the number of partitions compacted.
+    """
+    if older_than_days is None:
+        older_than_days = CONFIG['history']['compact_after_days']
+    cutoff = date.today() - timedelta(days=older_than_days)
+
+    compacted = 0
+    for day in _partition_days(end=cutoff):
+        with _write_lock:
+            files = _partition_files(day)
+            if len(files) < 2:
+                continue
+            try:
+                df = pd.concat(
+                    [pq.read_table(f).to_pandas() for f in files], ignore_index=True
+                )
+                df = df.drop_duplicates(subset=KEY_COLUMNS, keep='last')
+                df = df.sort_values(KEY_COLUMNS[::-1], ignore_index=True)
+                target = os.path.join(_partition_dir(day), COMPACTED_FILE)
+                _write_parquet(df, target)
+                for f in files:
+                    if f != target:
+                        os.remove(f)
+                compacted += 1
+                logger.info(f"Compacted {len(files)} files for {day}, rows: {len(df)}")
+            except Exception as e:
+                logger.error(f"Error compacting history partition {day}: {e}")
+    return compacted
+
+
+def start_compaction(interval: Optional[int] = None) -> threading.Thread:
+    """Run compact_history periodically in a daemon thread."""
+    if interval is None:
+        interval = CONFIG['history']['compact_interval']
+
+    def run():
+        while True:
+            try:
+                compact_history()
+            except Exception as e:
+                logger.error(f"History compaction failed: {e}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name='history-compaction', daemon=True)
+    thread.start()
+    return thread
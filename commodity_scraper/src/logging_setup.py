@@ -0,0 +1,213 @@
+# src/logging_setup.py
+
+import atexit
+import copy
+import queue
+import random
+import threading
+import time
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Optional
+import pandas as pd
+from config.settings import CONFIG
+
+ACCESS_LOGGER = 'werkzeug'
+FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+_listener: Optional[QueueListener] = None
+
+
+class LazyFrame:
+    """Log argument that renders a DataFrame preview only when the record is formatted."""
+
+    def __init__(self, df: pd.DataFrame, rows: int = 5):
+        self.df = df.head(rows).copy()
+
+    def __str__(self) -> str:
+        return self.df.to_string()
+
+
+def lazy_frame(df: pd.DataFrame, rows: int = 5) -> LazyFrame:
+    """Wrap df for a %s log argument, e.g. logger.debug("Sample:\\n%s", lazy_frame(df))."""
+    return LazyFrame(df, rows)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves records carrying a LazyFrame unformatted.
+
+    Those are rendered by the listener thread instead of the logging caller.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if isinstance(record.args, tuple) and any(isinstance(a, LazyFrame) for a in record.args):
+            record = copy.copy(record)
+            if record.exc_info:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+                record.exc_info = None
+            return record
+        return super().prepare(record)
+
+
+class BatchingRotatingFileHandler(RotatingFileHandler):
+    """Buffers formatted records and writes them in one call per batch.
+
+    A batch is written when it reaches `capacity` records, when the oldest
+    buffered record is `flush_interval` seconds old, or at once for errors.
+    Size-based rotation is checked per batch.
+    """
+
+    def __init__(self, filename: str, max_bytes: int, backup_count: int, capacity: int, flush_interval: float):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._first_buffered = 0.0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if not self._buffer:
+                self._first_buffered = time.monotonic()
+            self._buffer.append(self.format(record) + self.terminator)
+            if len(self._buffer) >= self.capacity or record.levelno >= logging.ERROR:
+                self.flush()
+            else:
+                self.flush_if_due()
+        except Exception:
+            self.handleError(record)
+
+    def flush_if_due(self) -> None:
+        if self._buffer and time.monotonic() - self._first_buffered >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            if not self._buffer:
+                return
+            data = ''.join(self._buffer)
+            self._buffer = []
+            if self.stream is None:
+                self.stream = self._open()
+            if self.maxBytes > 0 and self.stream.tell() + len(data) >= self.maxBytes:
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+            self.stream.write(data)
+            self.stream.flush()
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        self.flush()
+        super().close()
+
+
+class AccessSampler(logging.Filter):
+    """Keeps a random fraction of access log lines, and every 4xx/5xx response."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        args = record.args if isinstance(record.args, tuple) else ()
+        if len(args) > 1 and str(args[1])[:1] in ('4', '5'):
+            return True
+        return random.random() < self.rate
+
+
+class _OnlyAccess(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.name.startswith(ACCESS_LOGGER)
+
+
+class _NoAccess(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not record.name.startswith(ACCESS_LOGGER)
+
+
+def _file_handler(filename: str, settings: dict) -> BatchingRotatingFileHandler:
+    handler = BatchingRotatingFileHandler(
+        filename, settings['max_bytes'], settings['backup_count'],
+        settings['batch_size'], settings['flush_interval']
+    )
+    handler.setFormatter(logging.Formatter(FORMAT))
+    return handler
+
+
+def _flush_periodically(handlers: list, interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        for handler in handlers:
+            handler.acquire()
+            try:
+                handler.flush_if_due()
+            finally:
+                handler.release()
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(_stop_listener)
+
+
+def setup_logging(files: bool = True) -> None:
+    """Configure the root logger from CONFIG['logging'].
+
+    In async mode, callers only enqueue records; a listener thread formats
+    them and writes batches to the rotating app and access logs. The access
+    log (Werkzeug) is sampled and kept out of the app log and console.
+
+    Rotating files are not safe to share between processes, so only one
+    process may pass files=True; gunicorn workers log to stderr, which
+    they share with the master.
+    """
+    global _listener
+    settings = CONFIG['logging']
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(FORMAT))
+    console.addFilter(_NoAccess())
+    handlers = [console]
+    file_handlers = []
+    if files:
+        app_handler = _file_handler(settings['file'], settings)
+        app_handler.addFilter(_NoAccess())
+        access_handler = _file_handler(settings['access_file'], settings)
+        access_handler.addFilter(_OnlyAccess())
+        file_handlers = [app_handler, access_handler]
+        handlers += file_handlers
+
+    # Reconfiguring, e.g. in a server worker after fork
+    _stop_listener()
+
+    root = logging.getLogger()
+    root.setLevel(settings['level'])
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    access = logging.getLogger(ACCESS_LOGGER)
+    access.setLevel(logging.INFO)
+    for old in [f for f in access.filters if isinstance(f, AccessSampler)]:
+        access.removeFilter(old)
+    access.addFilter(AccessSampler(settings['access_sample_rate']))
+
+    if settings['async']:
+        log_queue: Any = queue.SimpleQueue()
+        root.addHandler(DeferredQueueHandler(log_queue))
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+    else:
+        for handler in handlers:
+            root.addHandler(handler)
+
+    if file_handlers:
+        threading.Thread(
+            target=_flush_periodically, args=(file_handlers, settings['flush_interval']),
+            name='log-flush', daemon=True
+        ).start()
@@ -0,0 +1,119 @@
+# src/metrics.py
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = {}
+_gauges: Dict[str, float] = {}
+_histograms: Dict[str, Dict] = {}
+
+PREFIX = 'commodity_'
+# Seconds; wide enough for sub-millisecond callbacks and multi-second fetches
+BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60
+)
+
+
+def _key(name: str, labels: Dict[str, str]) -> str:
+    if not labels:
+        return name
+    return name + '{' + ','.join(f'{k}="{v}"' for k, v in sorted(labels.items())) + '}'
+
+
+def incr(name: str, value: float = 1, **labels: str) -> None:
+    """Increment a process-wide counter."""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name: str, value: float, **labels: str) -> None:
+    """Set a gauge to its current value."""
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name: str, value: float, **labels: str) -> None:
+    """Record one observation in a histogram with the default buckets."""
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = {'name': name, 'labels': labels, 'buckets': [0] * len(BUCKETS), 'sum': 0.0, 'count': 0}
+        index = bisect.bisect_left(BUCKETS, value)
+        if index < len(BUCKETS):
+            hist['buckets'][index] += 1
+        hist['sum'] += value
+        hist['count'] += 1
+
+
+@contextmanager
+def timer(name: str, **labels: str) -> Iterator[None]:
+    """Observe the wall time of a block, in seconds; also usable as a decorator."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def get_counters() -> Dict[str, float]:
+    """Return a copy of all counters."""
+    with _lock:
+        return dict(_counters)
+
+
+def get_histogram(name: str, **labels: str) -> Dict:
+    """Return count and sum for one histogram, or zeros if nothing was observed."""
+    with _lock:
+        hist = _histograms.get(_key(name, labels))
+        return {'count': hist['count'], 'sum': hist['sum']} if hist else {'count': 0, 'sum': 0.0}
+
+
+def _series(key: str, suffix: str = '', extra: str = '') -> str:
+    name, _, labels = key.partition('{')
+    labels = labels.rstrip('}')
+    if extra:
+        labels = f'{labels},{extra}' if labels else extra
+    return f'{PREFIX}{name}{suffix}' + (f'{{{labels}}}' if labels else '')
+
+
+def _family(item: Tuple[str, object]) -> Tuple[str, str]:
+    # Keeps every series of one metric together, as the format requires
+    return item[0].partition('{')[0], item[0]
+
+
+def render_prometheus() -> str:
+    """Render every metric in the Prometheus text exposition format."""
+    lines: List[str] = []
+    typed = set()
+
+    def declare(name: str, kind: str) -> None:
+        if name not in typed:
+            typed.add(name)
+            lines.append(f'# TYPE {PREFIX}{name} {kind}')
+
+    with _lock:
+        for key, value in sorted(_counters.items(), key=_family):
+            name = key.partition('{')[0]
+            declare(f'{name}_total', 'counter')
+            lines.append(f'{_series(key, "_total")} {value}')
+        for key, value in sorted(_gauges.items(), key=_family):
+            declare(key.partition('{')[0], 'gauge')
+            lines.append(f'{_series(key)} {value}')
+        for key, hist in sorted(_histograms.items(), key=_family):
+            declare(hist['name'], 'histogram')
+            cumulative = 0
+            for bound, count in zip(BUCKETS, hist['buckets']):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f'{_series(key, "_bucket", le)} {cumulative}')
+            le = 'le="+Inf"'
+            lines.append(f'{_series(key, "_bucket", le)} {hist["count"]}')
+            lines.append(f'{_series(key, "_sum")} {hist["sum"]}')
+            lines.append(f'{_series(key, "_count")} {hist["count"]}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,86 @@
+# src/parsing.py
+
+import threading
+import logging
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Process-wide commodity interning: a name's category code is its id
+_names: List[str] = []
+_name_ids = {}
+_dtype = pd.CategoricalDtype([])
+_lock = threading.Lock()
+
+
+def split_commodity_cell(cell: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """Split a scraped cell like 'Soybeans\\n\\nUSd/Bu' into (name, unit, currency)."""
+    lines = [line.strip() for line in str(cell).splitlines() if line.strip()]
+    if not lines:
+        return str(cell).strip(), None, None
+    name = lines[0]
+    if len(lines) < 2:
+        return name, None, None
+    quote = lines[-1]
+    if '/' in quote:
+        currency, unit = (part.strip() for part in quote.split('/', 1))
+        return name, unit or None, currency or None
+    return name, quote, None
+
+
+def commodity_names(series: pd.Series) -> pd.Series:
+    """Return only the name part of each commodity cell, splitting each distinct cell once."""
+    codes, uniques = pd.factorize(series)
+    names = np.array([split_commodity_cell(u)[0] for u in uniques] + [None], dtype=object)
+    return pd.Series(names[codes], index=series.index, name=series.name)
+
+
+def intern_commodities(names: Iterable[str]) -> pd.CategoricalDtype:
+    """Register names and return the shared categorical dtype covering every name seen."""
+    global _dtype
+    with _lock:
+        new = [n for n in dict.fromkeys(names) if n not in _name_ids]
+        if new:
+            for name in new:
+                _name_ids[name] = len(_names)
+                _names.append(name)
+            _dtype = pd.CategoricalDtype(list(_names))
+        return _dtype
+
+
+def commodity_id(name: str) -> Optional[int]:
+    """Return the interned id of a commodity name, or None if never seen."""
+    return _name_ids.get(name)
+
+
+def _categorical(values: np.ndarray, existing: Optional[pd.Series]) -> pd.Categorical:
+    series = pd.Series(values, index=existing.index if existing is not None else None, dtype=object)
+    if existing is not None:
+        # Cells already split on a previous clean keep their stored value
+        series = series.fillna(existing.astype(object))
+    return pd.Categorical(series)
+
+
+def parse_commodities(df: pd.DataFrame) -> pd.DataFrame:
+    """Split 'commodity' into interned categorical name plus categorical unit and currency.
+
+    Parsing runs once per distinct cell; rows are mapped back through integer
+    codes. Missing commodities stay missing.
+    """
+    codes, uniques = pd.factorize(df['commodity'])
+    parsed = [split_commodity_cell(u) for u in uniques]
+    names = [p[0] for p in parsed]
+
+    dtype = intern_commodities(names)
+    # A trailing slot for code -1 keeps missing rows missing
+    ids = np.append(dtype.categories.get_indexer(names), -1)
+    units = np.array([p[1] for p in parsed] + [None], dtype=object)
+    currencies = np.array([p[2] for p in parsed] + [None], dtype=object)
+
+    df = df.copy()
+    df['commodity'] = pd.Categorical.from_codes(ids[codes], dtype=dtype)
+    df['unit'] = _categorical(units[codes], df['unit'] if 'unit' in df.columns else None)
+    df['currency'] = _categorical(currencies[codes], df['currency'] if 'currency' in df.columns else None)
+    return df
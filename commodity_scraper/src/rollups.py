@@ -0,0 +1,222 @@
+# src/rollups.py
+
+import os
+import shutil
+import threading
+import logging
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from config.settings import CONFIG
+from src import metrics
+from src.files import atomic_write
+from src.history import read_history, stored_days
+
+logger = logging.getLogger(__name__)
+
+KEY_COLUMNS = ['commodity', 'bucket']
+ROLLUP_COLUMNS = KEY_COLUMNS + ['open', 'high', 'low', 'close', 'volume', 'open_ts', 'close_ts']
+
+# Frequency -> (bucket length, partition file name format of the bucket start).
+# A partition holds one day of hourly, one month of daily or one year of weekly
+# buckets, so an update rewrites a few small files whatever the history size.
+FREQUENCIES: Dict[str, tuple] = {
+    'hourly': (pd.Timedelta(hours=1), '%Y-%m-%d'),
+    'daily': (pd.Timedelta(days=1), '%Y-%m'),
+    'weekly': (pd.Timedelta(weeks=1), '%Y'),
+}
+
+_lock = threading.Lock()
+
+
+def _root() -> str:
+    return CONFIG['rollups']['path']
+
+
+def _partition_path(frequency: str, partition: str) -> str:
+    return os.path.join(_root(), frequency, f"{partition}.parquet")
+
+
+def _bucket_start(timestamps: pd.Series, frequency: str) -> pd.Series:
+    if frequency == 'weekly':
+        # Weeks start on Monday
+        return timestamps.dt.to_period('W-SUN').dt.start_time
+    return timestamps.dt.floor(FREQUENCIES[frequency][0])
+
+
+def _aggregate(rows: pd.DataFrame) -> pd.DataFrame:
+    """OHLC per (commodity, bucket) of raw rows; volume is the number of samples."""
+    rows = rows.sort_values('timestamp', kind='stable')
+    return rows.groupby(KEY_COLUMNS, sort=False, observed=True).agg(
+        open=('price', 'first'),
+        high=('price', 'max'),
+        low=('price', 'min'),
+        close=('price', 'last'),
+        volume=('price', 'size'),
+        open_ts=('timestamp', 'min'),
+        close_ts=('timestamp', 'max'),
+    ).reset_index()
+
+
+def _combine(stored: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """Merge new partial bars into the stored bars of a partition.
+
+    Open and close come from whichever side holds the earliest and latest
+    sample, so late rows only move them when they are actually older or newer.
+    Only the buckets present in `new` are touched.
+    """
+    stored = stored.set_index(KEY_COLUMNS)
+    new = new.set_index(KEY_COLUMNS)
+    old = stored.reindex(new.index)
+    # Comparisons with a missing (NaT) bar are False, so brand-new buckets take the new values
+    earlier = ~(old['open_ts'] <= new['open_ts'])
+    later = ~(old['close_ts'] > new['close_ts'])
+    merged = pd.DataFrame({
+        'open': new['open'].where(earlier, old['open']),
+        'high': np.fmax(old['high'], new['high']),
+        'low': np.fmin(old['low'], new['low']),
+        'close': new['close'].where(later, old['close']),
+        'volume': (old['volume'].fillna(0) + new['volume']).astype('int64'),
+        'open_ts': new['open_ts'].where(earlier, old['open_ts']),
+        'close_ts': new['close_ts'].where(later, old['close_ts']),
+    })
+    return pd.concat([stored[~stored.index.isin(new.index)], merged]).reset_index()[ROLLUP_COLUMNS]
+
+
+def _write_partition(df: pd.DataFrame, path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df = df.sort_values(['bucket', 'commodity'], ignore_index=True)
+    table = pa.Table.from_pandas(df[ROLLUP_COLUMNS], preserve_index=False)
+    atomic_write(path, lambda tmp_path: pq.write_table(table, tmp_path))
+
+
+def _apply(rows: pd.DataFrame) -> int:
+    """Fold raw rows into every configured rollup; returns the number of bars written."""
+    written = 0
+    for frequency in CONFIG['rollups']['frequencies']:
+        partition_format = FREQUENCIES[frequency][1]
+        bars = _aggregate(rows.assign(bucket=_bucket_start(rows['timestamp'], frequency)))
+        for partition, part in bars.groupby(bars['bucket'].dt.strftime(partition_format)):
+            path = _partition_path(frequency, partition)
+            if os.path.exists(path):
+                part = _combine(pq.read_table(path).to_pandas(), part)
+            _write_partition(part, path)
+            written += len(part)
+    return written
+
+
+def _raw_rows(df: pd.DataFrame) -> pd.DataFrame:
+    rows = df[['commodity', 'timestamp', 'price']].copy()
+    rows['commodity'] = rows['commodity'].astype(str)
+    rows['timestamp'] = pd.to_datetime(rows['timestamp'], errors='coerce')
+    rows['price'] = pd.to_numeric(rows['price'], errors='coerce')
+    return rows.dropna()
+
+
+def update_rollups(df: Optional[pd.DataFrame]) -> Optional[int]:
+    """Fold newly stored history rows into the OHLC rollups.
+
+    Pass the rows append_history actually wrote: rows it skipped as already
+    stored must not be counted twice. Rows older than the current bucket
+    update the bar they belong to. Only the touched partitions are rewritten,
+    so the cost follows the snapshot size, not the history size.
+    """
+    if df is None or df.empty:
+        logger.info("No new history rows for rollups")
+        return 0
+    try:
+        rows = _raw_rows(df)
+        with metrics.timer('rollup_update_seconds'), _lock:
+            written = _apply(rows)
+        metrics.incr('rows', len(rows), stage='rollups')
+        logger.info(f"Rollups updated from {len(rows)} rows, {written} bars rewritten")
+        return written
+    except Exception as e:
+        logger.error(f"Error updating rollups: {e}")
+        return None
+
+
+def rebuild_rollups() -> Optional[int]:
+    """Recompute every rollup from the raw history, one month at a time."""
+    try:
+        with _lock:
+            shutil.rmtree(_root(), ignore_errors=True)
+            rows = 0
+            months: Dict[tuple, List[date]] = {}
+            for day in stored_days():
+                months.setdefault((day.year, day.month), []).append(day)
+            for days in months.values():
+                history = read_history(days[0], datetime.combine(days[-1], datetime.max.time()),
+                                       columns=['commodity', 'timestamp', 'price'])
+                if not history.empty:
+                    _apply(_raw_rows(history))
+                    rows += len(history)
+        logger.info(f"Rebuilt rollups from {rows} history rows")
+        return rows
+    except Exception as e:
+        logger.error(f"Error rebuilding rollups: {e}")
+        return None
+
+
+def bootstrap_rollups() -> None:
+    """Build the rollups from history once, when none exist yet."""
+    if not os.path.isdir(_root()) and stored_days():
+        rebuild_rollups()
+
+
+def read_rollups(
+    frequency: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    commodities: Optional[Iterable[str]] = None
+) -> pd.DataFrame:
+    """Read bars whose bucket starts in [start, end], opening only the overlapping partitions."""
+    partition_format = FREQUENCIES[frequency][1]
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    first = _bucket_start(pd.Series([start]), frequency)[0] if start is not None else None
+
+    directory = os.path.join(_root(), frequency)
+    names = sorted(name[:-len('.parquet')] for name in os.listdir(directory)
+                   if name.endswith('.parquet')) if os.path.isdir(directory) else []
+    paths = [
+        _partition_path(frequency, name) for name in names
+        if (first is None or name >= first.strftime(partition_format))
+        and (end is None or name <= end.strftime(partition_format))
+    ]
+    if not paths:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+
+    filters = []
+    if first is not None:
+        filters.append(('bucket', '>=', first.to_pydatetime()))
+    if end is not None:
+        filters.append(('bucket', '<=', end.to_pydatetime()))
+    if commodities is not None:
+        filters.append(('commodity', 'in', list(commodities)))
+    df = pq.ParquetDataset(paths, filters=filters or None).read().to_pandas()
+    return df.sort_values(['bucket', 'commodity'], ignore_index=True)
+
+
+def pick_frequency(start: Optional[datetime], end: Optional[datetime], points: int) -> Optional[str]:
+    """Coarsest resolution needed to draw [start, end] with about `points` points per commodity.
+
+    Returns None when the raw samples fit, otherwise the finest configured
+    rollup with at most `points` buckets in the range (or the coarsest one).
+    """
+    configured = sorted(CONFIG['rollups']['frequencies'], key=lambda f: FREQUENCIES[f][0])
+    if not configured:
+        return None
+    if start is None or end is None:
+        return configured[-1]
+    span = pd.Timestamp(end) - pd.Timestamp(start)
+    if span / pd.Timedelta(seconds=CONFIG['scheduler']['interval']) <= points:
+        return None
+    for frequency in configured:
+        if span / FREQUENCIES[frequency][0] <= points:
+            return frequency
+    return configured[-1]
@@ -0,0 +1,178 @@
+# src/runner.py
+
+import json
+import threading
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, Optional
+from config.settings import CONFIG
+from src import metrics
+from src.files import atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_runner: Optional['JobRunner'] = None
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a named stage of the job run executing on this thread."""
+    run = getattr(_local, 'run', None)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.observe('job_stage_seconds', elapsed, stage=name)
+        if run is not None:
+            run['stages'][name] = round(elapsed, 4)
+
+
+class JobRunner:
+    """Runs a job on a fixed interval in a background thread.
+
+    Runs are anchored to the start time, so a slow run doesn't push later
+    ones back; slots that pass while a run is still going are skipped, and
+    a run requested while another is in flight is rejected.
+    """
+
+    def __init__(
+        self,
+        job: Callable[[], Optional[str]],
+        interval: float,
+        history_size: int = 50,
+        setup: Optional[Callable[[], Any]] = None
+    ):
+        self.job = job
+        self.setup = setup
+        self.interval = interval
+        self.history: deque = deque(maxlen=history_size)
+        self.next_run: Optional[float] = None
+        self._running = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the schedule; setup, then the first run, begin immediately in the background."""
+        self._thread = threading.Thread(target=self._loop, name='job-runner', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def trigger(self) -> None:
+        """Ask the runner thread to run now instead of at the next slot."""
+        self._wake.set()
+
+    def run_once(self) -> bool:
+        """Run the job unless a run is already in flight; returns whether it ran."""
+        if not self._running.acquire(blocking=False):
+            metrics.incr('job_overlap_rejected')
+            logger.warning("Job already running, run skipped")
+            return False
+        run: Dict[str, Any] = {'started_at': datetime.now().isoformat(), 'stages': {}}
+        _local.run = run
+        before = metrics.get_counters()
+        start = time.perf_counter()
+        try:
+            run['status'] = self.job() or 'ok'
+        except Exception as e:
+            run['status'] = 'error'
+            run['error'] = str(e)
+            metrics.incr('job_errors')
+            logger.exception(f"Job failed: {e}")
+        finally:
+            run['duration'] = round(time.perf_counter() - start, 4)
+            metrics.observe('job_seconds', run['duration'])
+            run['counters'] = {
+                name: value - before.get(name, 0)
+                for name, value in metrics.get_counters().items() if value != before.get(name, 0)
+            }
+            _local.run = None
+            self.history.append(run)
+            self._running.release()
+        # One structured line per run: status, stage timings, rows, bytes and cache hits
+        logger.info(f"job_summary {json.dumps(run, sort_keys=True)}")
+        self.export_status()
+        return True
+
+    def export_status(self) -> None:
+        """Write the run history and this process's metrics for the server processes."""
+        try:
+            atomic_write_text(CONFIG['scheduler']['status_file'], json.dumps({
+                'updated_at': datetime.now().isoformat(),
+                'jobs': self.status(),
+                'metrics': metrics.render_prometheus()
+            }))
+        except OSError as e:
+            logger.error(f"Error exporting scraper status: {e}")
+
+    def _run_setup(self) -> None:
+        # Holds the run lock, so no run can start before setup has finished
+        with self._running:
+            try:
+                self.setup()
+            except Exception as e:
+                logger.exception(f"Runner setup failed: {e}")
+
+    def _loop(self) -> None:
+        if self.setup is not None:
+            self._run_setup()
+        self.next_run = time.monotonic()
+        while not self._stop.is_set():
+            delay = self.next_run - time.monotonic()
+            triggered = delay > 0 and self._wake.wait(delay)
+            if triggered:
+                self._wake.clear()
+                if self._stop.is_set():
+                    break
+            self.run_once()
+            if not triggered:
+                self.next_run += self.interval
+            now = time.monotonic()
+            if self.next_run <= now:
+                missed = int((now - self.next_run) // self.interval) + 1
+                metrics.incr('job_slots_missed', missed)
+                logger.warning(f"Job overran its interval, skipping {missed} slot(s)")
+                self.next_run += missed * self.interval
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'running': self._running.locked(),
+            'interval': self.interval,
+            'next_run_in': round(self.next_run - time.monotonic(), 1) if self.next_run is not None else None,
+            'history': list(self.history)
+        }
+
+
+def start_runner(job: Callable[[], Optional[str]], setup: Optional[Callable[[], Any]] = None) -> JobRunner:
+    """Create and start the process-wide job runner from CONFIG['scheduler'].
+
+    `setup` runs once on the runner thread before the first run, e.g. for
+    slow bootstraps that must finish before the job touches their data.
+    """
+    global _runner
+    settings = CONFIG['scheduler']
+    _runner = JobRunner(job, settings['interval'], settings['history_size'], setup=setup)
+    _runner.start()
+    return _runner
+
+
+def job_history() -> Optional[Dict[str, Any]]:
+    """Return the runner's state and recent runs, or None if no runner was started."""
+    return _runner.status() if _runner is not None else None
+
+
+def load_scraper_status() -> Optional[Dict[str, Any]]:
+    """Read the status the scraper process last exported, e.g. from a server worker."""
+    try:
+        with open(CONFIG['scheduler']['status_file']) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,128 @@
+# src/schema.py
+
+import logging
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from src.parsing import parse_commodities
+
+logger = logging.getLogger(__name__)
+
+# Canonical snapshot columns and their dtypes, in output order
+SNAPSHOT_SCHEMA: Dict[str, str] = {
+    'commodity': 'category',
+    'unit': 'category',
+    'currency': 'category',
+    'price': 'float64',
+    'day': 'float64',
+    'change': 'float32',
+    'weekly': 'float32',
+    'monthly': 'float32',
+    'ytd': 'float32',
+    'yoy': 'float32',
+    'date': 'category',
+    'timestamp': 'datetime64[ns]'
+}
+
+# Arrow types for the columnar snapshot export
+ARROW_SCHEMA = pa.schema([
+    (col, {
+        'category': pa.dictionary(pa.int32(), pa.string()),
+        'float64': pa.float64(),
+        'float32': pa.float32(),
+        'datetime64[ns]': pa.timestamp('ns'),
+    }[dtype])
+    for col, dtype in SNAPSHOT_SCHEMA.items()
+])
+
+# Scraped as '6.08%' strings, stored as fractions
+PERCENT_COLUMNS = ['change', 'weekly', 'monthly', 'ytd', 'yoy']
+
+_NON_NUMERIC = r'[^0-9.\-]'
+_NUMBER = r'^-?(\d+\.?\d*|\.\d+)$'
+
+
+def _standardize(col: Any) -> str:
+    return str(col).strip().replace(' ', '_').replace('%', 'percent').lower()
+
+
+@lru_cache(maxsize=64)
+def column_plan(columns: Tuple[Any, ...]) -> Dict[Any, str]:
+    """Map raw headers to standardized or canonical names, once per header signature."""
+    standardized = [_standardize(col) for col in columns]
+    col_map = {}
+    for col in standardized:
+        if any(k in col for k in ['commodity', 'name', 'item']):
+            col_map[col] = 'commodity'
+        elif 'price' in col:
+            col_map[col] = 'price'
+        elif any(k in col for k in ['change', 'chg', 'percent']):
+            col_map[col] = 'change'
+    
+    # Ensure commodity column
+    if not col_map.get('commodity') and len(standardized) > 0:
+        col_map[standardized[0]] = 'commodity'
+    return {raw: col_map.get(std, std) for raw, std in zip(columns, standardized)}
+
+
+def parse_numeric(series: pd.Series) -> pd.Series:
+    """Strip everything but digits, sign and point in one Arrow regex pass, then cast.
+
+    Columns that are already numeric (e.g. re-read from our own CSV) are returned as is.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype('float64')
+    try:
+        arr = pa.array(series, type=pa.string(), from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        arr = pa.array(series.astype(str), type=pa.string())
+    digits = pc.replace_substring_regex(arr, _NON_NUMERIC, '')
+    valid = pc.match_substring_regex(digits, _NUMBER)
+    values = pc.cast(pc.if_else(valid, digits, None), pa.float64())
+    return pd.Series(values.to_numpy(zero_copy_only=False), index=series.index, name=series.name)
+
+
+def enforce_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Rename columns to canonical names and cast them to SNAPSHOT_SCHEMA.
+
+    Percent strings become fractions; numeric percent columns are taken to
+    be fractions already. Columns outside the schema are kept after the
+    schema columns. The call is idempotent.
+    """
+    df = df.rename(columns=column_plan(tuple(df.columns)))
+    if 'commodity' in df.columns and not isinstance(df['commodity'].dtype, pd.CategoricalDtype):
+        df = parse_commodities(df)
+
+    columns = {}
+    for col, dtype in SNAPSHOT_SCHEMA.items():
+        if col not in df.columns:
+            continue
+        series = df[col]
+        if col in PERCENT_COLUMNS:
+            if not pd.api.types.is_numeric_dtype(series):
+                series = parse_numeric(series) / 100
+            series = series.astype(dtype)
+        elif dtype.startswith('float'):
+            series = parse_numeric(series).astype(dtype)
+        elif dtype.startswith('datetime'):
+            series = pd.to_datetime(series, errors='coerce')
+        elif not isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype(dtype)
+        columns[col] = series
+    extra = [col for col in df.columns if col not in SNAPSHOT_SCHEMA]
+    return pd.DataFrame({**columns, **{col: df[col] for col in extra}}, index=df.index)
+
+
+def widen_float32(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast float32 columns to float64 through their shortest repr.
+
+    Plain astype keeps the float32 error (0.0134 becomes 0.01339999958...);
+    going through the repr writes 0.0134 to float64 sinks such as the
+    database and the change stream.
+    """
+    return df.assign(**{
+        col: df[col].to_numpy().astype(str).astype('float64')
+        for col in df.select_dtypes('float32').columns
+    })
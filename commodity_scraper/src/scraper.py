@@ -1,88 +1,203 @@
 # src/scraper.py
 
-import requests
-from bs4 import BeautifulSoup
+from lxml.html import HtmlElement
 import pandas as pd
-from typing import Optional
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
 import logging
 from config.settings import CONFIG
+from src import metrics
+from src.logging_setup import lazy_frame
+from src.extract import extract_rows, parse_html, table_html
+from src.parsing import commodity_names
+from src.schema import enforce_schema
+from src.table_selection import find_table
+from src.fetcher import fetch_pages, discard_url_state, get_url_state, update_url_state, save_url_state
+from src.workers import parse_in_pool
 
 logger = logging.getLogger(__name__)
 
+# Returned by scrape_commodities when no source changed since the last run
+UNCHANGED = pd.DataFrame()
+
+# Frames of committed scrapes; the current run's new frames wait in _pending_frames
+_last_frames: Dict[str, pd.DataFrame] = {}
+_pending_frames: Dict[str, pd.DataFrame] = {}
+_last_details: Dict[str, Dict[str, Any]] = {}
+
 def scrape_commodities() -> Optional[pd.DataFrame]:
-    """Scrape the agricultural commodity table from the target website."""
+    """Scrape the agricultural commodity tables from all configured pages.
+
+    Returns UNCHANGED when every page is either not modified or yields the
+    same table body as the last committed run. New validators, hashes and
+    frames are staged until commit_scrape_state; anything a previous run
+    left uncommitted is dropped, so its pages are processed again.
+    """
+    discard_scrape_state()
+    urls = CONFIG['scrape_urls']
+    pages = fetch_pages(urls)
+    # A page reported unchanged is only usable if its last frame is still in memory
+    stale = [
+        url for url, page in pages.items()
+        if page.not_modified and url not in _last_frames
+    ]
+    if stale:
+        pages.update(fetch_pages(stale, conditional=False))
+
+    frames = []
+    changed = False
+    failed = []
+    for url, page in pages.items():
+        if page.not_modified:
+            metrics.incr('fetch_not_modified')
+            frames.append(_last_frames[url])
+            continue
+        df = None
+        if page.content is not None:
+            update_url_state(url, etag=page.etag, last_modified=page.last_modified)
+            df = _scrape_page(url, page.content)
+        if df is UNCHANGED:
+            metrics.incr('fetch_content_unchanged')
+            frames.append(_last_frames[url])
+        elif df is not None:
+            logger.info(f"Scraped {len(df)} rows from {url}")
+            _pending_frames[url] = df
+            frames.append(df)
+            changed = True
+        elif url in _last_frames:
+            # Keep the source's last rows so the snapshot doesn't drop its commodities
+            metrics.incr('source_failed')
+            logger.warning(f"No table from {url} this run, reusing its last scrape")
+            frames.append(_last_frames[url])
+        else:
+            metrics.incr('source_failed')
+            failed.append(url)
+
+    if failed and len(failed) < len(pages):
+        # A partial snapshot would read as those commodities being removed
+        logger.error(f"No data from {failed} and no earlier scrape to fall back on, run aborted")
+        return None
+    if not frames:
+        logger.error("No agricultural data scraped from any source")
+        return None
+    if not changed:
+        logger.info("All sources unchanged since last scrape")
+        return UNCHANGED
+    df = pd.concat(frames, ignore_index=True)
+    return df.drop_duplicates(subset=['commodity'], keep='first', ignore_index=True)
+
+def detail_url(name: str) -> str:
+    """Build a commodity's detail page URL from CONFIG['detail']['url_template']."""
+    slug = '-'.join(name.lower().split())
+    return CONFIG['detail']['url_template'].format(slug=slug)
+
+def scrape_details(df: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """Fetch and parse every commodity's detail page in the worker pool.
+
+    Returns one row per commodity with its contract specs and historical
+    tables as JSON, or None when the stage is disabled or nothing parsed.
+    """
+    if not CONFIG['detail']['enabled'] or df is None or df.empty:
+        return None
+    urls = {detail_url(str(name)): str(name) for name in df['commodity'].dropna().unique()}
+    pages = fetch_pages(urls)
+    stale = [url for url, page in pages.items() if page.not_modified and url not in _last_details]
+    if stale:
+        pages.update(fetch_pages(stale, conditional=False))
+
+    contents = {url: page.content for url, page in pages.items() if page.content is not None}
+    parsed = parse_in_pool(contents)
+    for url, page in pages.items():
+        if url in parsed:
+            update_url_state(url, etag=page.etag, last_modified=page.last_modified)
+            _last_details[url] = parsed[url]
+        elif page.not_modified:
+            metrics.incr('fetch_not_modified')
+
+    records = [
+        {
+            'commodity': name,
+            'url': url,
+            'specs': json.dumps(_last_details[url]['specs']),
+            'tables': json.dumps(_last_details[url]['tables']),
+        }
+        for url, name in urls.items() if url in _last_details
+    ]
+    if not records:
+        logger.warning("No commodity detail pages parsed")
+        return None
+    logger.info(f"Parsed {len(parsed)} of {len(urls)} detail pages ({len(records)} with data)")
+    details = pd.DataFrame(records)
+    details['timestamp'] = df['timestamp'].max()
+    return details
+
+def commit_scrape_state() -> None:
+    """Commit and persist the run's validators, hashes and frames once every sink holds its data."""
+    _last_frames.update(_pending_frames)
+    _pending_frames.clear()
     try:
-        response = requests.get(
-            CONFIG['https://tradingeconomics.com/commodities'],
-            headers={'User-Agent': CONFIG['user_agent']},
-            timeout=10
-        )
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        tables = soup.find_all('table')
-        logger.debug(f"Found {len(tables)} tables")
-        
-        # Find agricultural table
-        best_table = None
-        max_agri_matches = 0
-        for i, table in enumerate(tables):
-            # Check for preceding heading
-            prev_sibling = table.find_previous(['h2', 'h3'])
-            heading = prev_sibling.text.strip().lower() if prev_sibling else ''
-            is_agri_heading = 'agricult' in heading or 'soft' in heading
-            logger.debug(f"Table {i}: Heading='{heading}', Is_agri_heading={is_agri_heading}")
-            
-            # Count agricultural term matches
-            rows = table.find_all('tr')
-            agri_matches = sum(
-                1 for row in rows
-                for term in CONFIG['agri_terms']
-                if term in str(row).lower()
-            )
-            logger.debug(f"Table {i}: Agri_matches={agri_matches}")
-            
-            # Prioritize table with heading or most matches
-            if (is_agri_heading and agri_matches > 0) or agri_matches > max_agri_matches:
-                max_agri_matches = agri_matches
-                best_table = table
-                logger.debug(f"Table {i} selected as best so far")
-        
-        if best_table and max_agri_matches >= 2:
-            logger.info(f"Selected table with {max_agri_matches} agricultural term matches")
+        save_url_state()
+    except OSError as e:
+        logger.error(f"Error saving scrape state: {e}")
+
+def discard_scrape_state() -> None:
+    """Forget the run's staged state, so the next run fetches and parses its pages again."""
+    _pending_frames.clear()
+    discard_url_state()
+
+def _digest(content: Any) -> str:
+    return hashlib.sha256(content if isinstance(content, bytes) else content.encode()).hexdigest()
+
+def _scrape_page(url: str, content: bytes) -> Optional[pd.DataFrame]:
+    """Select and parse the agricultural table from one page.
+
+    Returns UNCHANGED when the page or the selected table hashes to the same
+    value as last time and a parsed frame for the URL is cached.
+    """
+    state = get_url_state(url)
+    body_hash = _digest(content)
+    if body_hash == state.get('body_hash') and url in _last_frames:
+        return UNCHANGED
+
+    with metrics.timer('select_table_seconds'):
+        best_table, score = find_table(parse_html(content), url)
+    
+    if best_table is not None:
+        logger.info(f"Selected table with score {score}")
+        table_hash = _digest(table_html(best_table))
+        if table_hash == state.get('table_hash') and url in _last_frames:
+            update_url_state(url, body_hash=body_hash)
+            return UNCHANGED
+        with metrics.timer('parse_table_seconds'):
             df = _parse_table(best_table)
-            
-            # Validate agricultural commodities
-            if not df.empty and 'commodity' in df.columns:
-                df['commodity_lower'] = df['commodity'].str.lower()
-                agri_count = df['commodity_lower'].isin(CONFIG['agri_terms']).sum()
-                logger.info(f"Validation: Found {agri_count} agricultural commodities")
-                df = df.drop(columns=['commodity_lower'])
-                if agri_count >= 2:
-                    return df
-                else:
-                    logger.warning(f"Validation failed: Only {agri_count} agricultural commodities")
-                    return None
+        metrics.incr('rows', len(df), stage='parse')
+        
+        # Validate agricultural commodities
+        if not df.empty and 'commodity' in df.columns:
+            agri_count = commodity_names(df['commodity']).str.lower().isin(CONFIG['agri_terms']).sum()
+            logger.info(f"Validation: Found {agri_count} agricultural commodities")
+            if agri_count >= 2:
+                update_url_state(url, body_hash=body_hash, table_hash=table_hash)
+                return df
             else:
-                logger.error("Invalid DataFrame: Missing 'commodity' column or empty")
+                logger.warning(f"Validation failed: Only {agri_count} agricultural commodities")
                 return None
         else:
-            logger.error("No agricultural table found with sufficient matches")
+            logger.error("Invalid DataFrame: Missing 'commodity' column or empty")
             return None
-            
-    except requests.RequestException as e:
-        logger.error(f"Error scraping data: {e}")
+    else:
+        logger.error("No agricultural table found with sufficient score")
         return None
 
-def _parse_table(table: BeautifulSoup) -> pd.DataFrame:
+def _parse_table(table: HtmlElement) -> pd.DataFrame:
     """Parse HTML table into DataFrame."""
-    headers = [th.text.strip() for th in table.find_all('th')]
+    headers, rows = extract_rows(table)
+    return _build_frame(headers, rows)
+
+def _build_frame(headers: List[str], rows: List[List[str]]) -> pd.DataFrame:
+    """Build the scraped DataFrame from header and row cell texts."""
     logger.debug(f"Raw headers: {headers}")
-    
-    rows = [
-        [td.text.strip() for td in tr.find_all('td')]
-        for tr in table.find_all('tr')[1:] if tr.find_all('td')
-    ]
     logger.debug(f"Sample row: {rows[0] if rows else 'No rows'}")
     
     # Determine max columns from data rows
@@ -107,7 +222,6 @@ def _parse_table(table: BeautifulSoup) -> pd.DataFrame:
     
     # Assign columns
     df.columns = headers
-    df['timestamp'] = pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
     
     # Rename first column to 'commodity' if appropriate
     if not any('commodity' in h.lower() or 'name' in h.lower() for h in headers):
@@ -117,7 +231,12 @@ def _parse_table(table: BeautifulSoup) -> pd.DataFrame:
         else:
             logger.warning(f"Column rename skipped: {len(new_columns)} vs {df.shape[1]} columns")
     
+    df['timestamp'] = pd.Timestamp.now().floor('s')
+    
+    # Typed from here on: categorical names/units, float percentages, datetime timestamp
+    df = enforce_schema(df)
+    
     logger.info(f"Scraped DataFrame shape: {df.shape}")
     logger.info(f"Final columns: {df.columns.tolist()}")
-    logger.debug(f"Scraped sample:\n{df.head().to_string()}")
+    logger.debug("Scraped sample:\n%s", lazy_frame(df))
     return df
\ No newline at end of file
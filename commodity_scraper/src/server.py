@@ -0,0 +1,55 @@
+# src/server.py
+
+import multiprocessing
+import logging
+from typing import Any, Dict, Optional
+from config.settings import CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def worker_count() -> int:
+    """Configured worker processes, defaulting to one per core plus one."""
+    return CONFIG['server']['workers'] or multiprocessing.cpu_count() + 1
+
+
+def gunicorn_options() -> Dict[str, Any]:
+    server = CONFIG['server']
+    return {
+        'bind': f"{server['host']}:{server['port']}",
+        'workers': worker_count(),
+        # /events requests are held for up to push_hold_seconds; gevent workers
+        # keep them as greenlets, so they don't starve page requests. 'threads'
+        # only applies to a 'gthread' worker class.
+        'worker_class': server['worker_class'],
+        'worker_connections': server['worker_connections'],
+        'threads': server['threads'],
+        'timeout': server['timeout'],
+        'graceful_timeout': server['timeout'],
+        'keepalive': server['keepalive'],
+        # Each worker imports the app itself, so DB pools are created after fork
+        'preload_app': False,
+    }
+
+
+def serve(options: Optional[Dict[str, Any]] = None) -> None:
+    """Run the dashboard under gunicorn with CONFIG['server'] settings.
+
+    Workers read the snapshot the scraper process exports as an Arrow IPC
+    (Feather) file, memory-mapped, and reload it when it is replaced.
+    """
+    from gunicorn.app.base import BaseApplication
+
+    class DashboardApplication(BaseApplication):
+        def load_config(self):
+            for key, value in {**gunicorn_options(), **(options or {})}.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from wsgi import server
+            return server
+
+    if 'feather' not in CONFIG['export']['formats']:
+        logger.warning("Feather export disabled; workers will reload the snapshot from CSV")
+    logger.info(f"Serving dashboard on {CONFIG['server']['host']}:{CONFIG['server']['port']} with {worker_count()} workers")
+    DashboardApplication().run()
@@ -3,9 +3,11 @@
 import pandas as pd
 from typing import Optional, Dict, Any
 import logging
+from src import metrics
 
 logger = logging.getLogger(__name__)
 
+@metrics.timer('statistics_seconds')
 def generate_statistics(df: Optional[pd.DataFrame]) -> Optional[Dict[str, Any]]:
     """Generate basic statistics from DataFrame."""
     if df is None or df.empty:
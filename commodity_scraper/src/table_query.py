@@ -0,0 +1,176 @@
+# src/table_query.py
+
+import logging
+import operator
+from typing import Any, Dict, List, Optional, Tuple
+import pandas as pd
+from sqlalchemy import String, cast, func, select
+from config.settings import CONFIG
+from src.database import commodities_table, db_connection, ensure_schema, get_engine
+from src.cache import get_history_frame
+from src.history import history_version, read_history
+
+logger = logging.getLogger(__name__)
+
+TABLE_COLUMNS = commodities_table.columns.keys()
+
+# Operators DataTable writes into filter_query, in word and symbol form
+_OPERATORS = [
+    ('ge ', '>='), ('le ', '<='), ('lt ', '<'), ('gt ', '>'), ('ne ', '!='), ('eq ', '='),
+    ('contains ', 'contains'), ('datestartswith ', 'datestartswith')
+]
+_SYMBOLS = {'s>=': '>=', 's<=': '<=', 's<': '<', 's>': '>', 's!=': '!=', 's=': '=',
+            '>=': '>=', '<=': '<=', '<': '<', '>': '>', '!=': '!=', '=': '='}
+
+Filter = Tuple[str, str, Any]
+
+# Text operators match against the value as typed, never a float version of it
+_TEXT_OPERATORS = ('contains', 'datestartswith')
+_COMPARISONS = {
+    '=': operator.eq, '!=': operator.ne, '<': operator.lt,
+    '<=': operator.le, '>': operator.gt, '>=': operator.ge
+}
+
+
+def _parse_value(raw: str, column: str, op: str) -> Any:
+    raw = raw.strip()
+    if raw and raw[0] == raw[-1] and raw[0] in ("'", '"', '`'):
+        return raw[1:-1]
+    # Timestamps stay strings for pd.Timestamp: float('2026') would be 2026 ns after the epoch
+    if op in _TEXT_OPERATORS or column == 'timestamp':
+        return raw
+    try:
+        return float(raw)
+    except ValueError:
+        return raw
+
+
+def parse_filter_query(filter_query: Optional[str]) -> List[Filter]:
+    """Split a DataTable filter_query into (column, operator, value) triples."""
+    filters = []
+    if not filter_query:
+        return filters
+    for part in filter_query.split(' && '):
+        part = part.strip()
+        if not part.startswith('{') or '}' not in part:
+            continue
+        column, rest = part[1:].split('}', 1)
+        rest = rest.strip()
+        if column not in TABLE_COLUMNS:
+            continue
+        for word, op in _OPERATORS:
+            if rest.startswith(word):
+                filters.append((column, op, _parse_value(rest[len(word):], column, op)))
+                break
+        else:
+            for symbol in sorted(_SYMBOLS, key=len, reverse=True):
+                if rest.startswith(symbol):
+                    filters.append((column, _SYMBOLS[symbol], _parse_value(rest[len(symbol):], column, _SYMBOLS[symbol])))
+                    break
+    return filters
+
+
+def _sql_condition(column: str, op: str, value: Any):
+    col = commodities_table.c[column]
+    if op == 'contains':
+        return col.contains(str(value), autoescape=True)
+    if op == 'datestartswith':
+        return cast(col, String).startswith(str(value))
+    if column == 'timestamp':
+        value = pd.Timestamp(value).to_pydatetime()
+    return _COMPARISONS[op](col, value)
+
+
+def _query_db(filters: List[Filter], sort_by: List[Dict[str, str]], page: int, page_size: int) -> Tuple[pd.DataFrame, int]:
+    ensure_schema(get_engine())
+    conditions = [_sql_condition(*f) for f in filters]
+    base = select(commodities_table).where(*conditions)
+    order = [
+        commodities_table.c[s['column_id']].desc() if s['direction'] == 'desc'
+        else commodities_table.c[s['column_id']].asc()
+        for s in sort_by if s['column_id'] in TABLE_COLUMNS
+    ] or [commodities_table.c.timestamp.desc(), commodities_table.c.commodity.asc()]
+    with db_connection() as conn:
+        total = conn.execute(select(func.count()).select_from(base.subquery())).scalar_one()
+        df = pd.read_sql(base.order_by(*order).limit(page_size).offset(page * page_size), conn)
+    return df, total
+
+
+def _sort_key(series: pd.Series) -> pd.Series:
+    # Category codes follow interning order, not the values
+    return series.astype(object) if isinstance(series.dtype, pd.CategoricalDtype) else series
+
+
+def _read_history_sorted(start: Optional[pd.Timestamp], end: Optional[pd.Timestamp],
+                         commodities: Optional[List[str]]) -> pd.DataFrame:
+    df = read_history(start=start, end=end, commodities=commodities, columns=TABLE_COLUMNS)
+    return df.sort_values(['timestamp', 'commodity'], ascending=[False, True], key=_sort_key, ignore_index=True)
+
+
+def _query_history(filters: List[Filter], sort_by: List[Dict[str, str]], page: int, page_size: int) -> Tuple[pd.DataFrame, int]:
+    # Equality on commodity and timestamp bounds prune partitions and row groups;
+    # every predicate is then applied to the pruned frame. The scan, already in
+    # the default order, is cached per history version, so paging the default
+    # view doesn't read the store again.
+    commodities, start, end = None, None, None
+    for column, op, value in filters:
+        if column == 'commodity' and op == '=':
+            commodities = [value]
+        elif column == 'timestamp' and op in ('>', '>='):
+            start = pd.Timestamp(value)
+        elif column == 'timestamp' and op in ('<', '<='):
+            end = pd.Timestamp(value)
+    key = (history_version(), start, end, tuple(commodities or ()))
+    df = get_history_frame(key, lambda: _read_history_sorted(start, end, commodities))
+
+    for column, op, value in filters:
+        if column not in df.columns:
+            continue
+        series = df[column]
+        if op in _TEXT_OPERATORS:
+            mask = series.astype(str).str.contains(str(value), regex=False) if op == 'contains' \
+                else series.astype(str).str.startswith(str(value))
+        else:
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                # Unordered categoricals only support equality
+                series = series.astype(object)
+            elif column == 'timestamp':
+                value = pd.Timestamp(value)
+            mask = _COMPARISONS[op](series, value)
+        df = df[mask]
+
+    sort_by = [s for s in sort_by if s['column_id'] in df.columns]
+    if sort_by:
+        df = df.sort_values(
+            [s['column_id'] for s in sort_by],
+            ascending=[s['direction'] == 'asc' for s in sort_by],
+            key=_sort_key
+        )
+    start_row = page * page_size
+    return df.iloc[start_row:start_row + page_size], len(df)
+
+
+def query_page(
+    filter_query: Optional[str],
+    sort_by: Optional[List[Dict[str, str]]],
+    page_current: Optional[int],
+    page_size: int
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Return one page of table records and the total matching row count."""
+    filters = parse_filter_query(filter_query)
+    sort_by = sort_by or []
+    page = page_current or 0
+
+    df, total = None, 0
+    if CONFIG['dashboard']['table_source'] == 'db':
+        try:
+            df, total = _query_db(filters, sort_by, page, page_size)
+        except Exception as e:
+            logger.error(f"Table query against database failed, using history store: {e}")
+    if df is None:
+        df, total = _query_history(filters, sort_by, page, page_size)
+
+    df = df.astype({col: object for col in df.select_dtypes('category').columns})
+    if 'timestamp' in df.columns:
+        df = df.assign(timestamp=pd.to_datetime(df['timestamp']).dt.strftime("%Y-%m-%d %H:%M:%S"))
+    return df.fillna('-').to_dict('records'), total
@@ -0,0 +1,100 @@
+# src/table_selection.py
+
+import logging
+from typing import Callable, Dict, Optional, Tuple
+from lxml.html import HtmlElement
+from config.settings import CONFIG
+from src import metrics
+from src.extract import agri_pattern, count_agri_matches, tables_with_headings
+from src.fetcher import get_url_state, update_url_state
+
+logger = logging.getLogger(__name__)
+
+# A scorer takes a table and the text of its preceding heading and returns a score
+Scorer = Callable[[HtmlElement, str], float]
+
+SCORERS: Dict[str, Scorer] = {}
+
+
+def register_scorer(name: str) -> Callable[[Scorer], Scorer]:
+    """Register a table scorer under a name usable in CONFIG['selection']['scorers']."""
+    def decorator(fn: Scorer) -> Scorer:
+        SCORERS[name] = fn
+        return fn
+    return decorator
+
+
+@register_scorer('heading')
+def heading_scorer(table: HtmlElement, heading: str) -> float:
+    """1 when the preceding heading names an agricultural section."""
+    return float(any(k in heading for k in CONFIG['selection']['heading_keywords']))
+
+
+@register_scorer('agri_terms')
+def agri_terms_scorer(table: HtmlElement, heading: str) -> float:
+    """Number of (row, term) matches against CONFIG['agri_terms']."""
+    return float(count_agri_matches(table, agri_pattern()))
+
+
+def _weights(url: Optional[str]) -> Dict[str, float]:
+    selection = CONFIG['selection']
+    return selection.get('sources', {}).get(url, selection['scorers'])
+
+
+def score_table(table: HtmlElement, heading: str, weights: Dict[str, float]) -> float:
+    """Weighted sum of the configured scorers."""
+    return sum(weight * SCORERS[name](table, heading) for name, weight in weights.items())
+
+
+def header_signature(table: HtmlElement) -> str:
+    """Lowercased header texts, used to confirm a cached locator still points at the same table."""
+    return '|'.join(th.text_content().strip().lower() for th in table.iter('th'))
+
+
+def _scan(root: HtmlElement, weights: Dict[str, float]) -> Tuple[Optional[HtmlElement], float]:
+    best_table, best_score = None, 0.0
+    for i, (table, heading) in enumerate(tables_with_headings(root)):
+        score = score_table(table, heading, weights)
+        logger.debug(f"Table {i}: Heading='{heading}', Score={score}")
+        if score > best_score:
+            best_table, best_score = table, score
+    return best_table, best_score
+
+
+def _cached_table(root: HtmlElement, url: str) -> Tuple[Optional[HtmlElement], float]:
+    state = get_url_state(url)
+    if not state.get('table_path'):
+        return None, 0.0
+    matches = root.getroottree().xpath(state['table_path'])
+    if matches and header_signature(matches[0]) == state.get('table_signature'):
+        return matches[0], state.get('table_score', 0.0)
+    logger.info(f"Cached table locator for {url} no longer matches, rescanning")
+    return None, 0.0
+
+
+def find_table(root: HtmlElement, url: Optional[str] = None) -> Tuple[Optional[HtmlElement], float]:
+    """Return the best-scoring table and its score, or (None, 0).
+
+    With a URL, the table located on the previous run is tried first and
+    the full scan only runs when its header signature no longer matches.
+    A table below CONFIG['selection']['min_score'] is not returned.
+    """
+    weights = _weights(url)
+    if url is not None:
+        table, score = _cached_table(root, url)
+        if table is not None:
+            metrics.incr('table_locator_hits')
+            return table, score
+
+    metrics.incr('table_locator_misses')
+    table, score = _scan(root, weights)
+    if table is None or score < CONFIG['selection']['min_score']:
+        return None, 0.0
+    if url is not None:
+        update_url_state(
+            url,
+            table_path=root.getroottree().getpath(table),
+            table_signature=header_signature(table),
+            table_score=score
+        )
+    return table, score
@@ -0,0 +1,155 @@
+# src/workers.py
+
+import atexit
+import multiprocessing
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+from config.settings import CONFIG
+from src import metrics
+from src.extract import extract_rows, parse_html
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+# Workers report each task start here, so timeouts count from the actual start
+_started: Any = None
+_lock = threading.Lock()
+# How often parse_in_pool checks running tasks against their deadline (s)
+POLL_INTERVAL = 0.1
+
+
+def parse_detail_page(content: bytes) -> Dict[str, Any]:
+    """Parse a commodity detail page into compact, picklable records.
+
+    Tables with a header row are returned as {'headers', 'rows'} (the same
+    extraction the main table uses); two-column tables without headers are
+    read as contract specs.
+    """
+    root = parse_html(content)
+    specs: Dict[str, str] = {}
+    tables: List[Dict[str, Any]] = []
+    for table in root.iter('table'):
+        if table.find('.//th') is None:
+            for tr in table.iter('tr'):
+                cells = [td.text_content().strip() for td in tr.iter('td')]
+                if len(cells) == 2 and cells[0]:
+                    specs[cells[0].rstrip(':')] = cells[1]
+            continue
+        headers, rows = extract_rows(table)
+        if rows:
+            tables.append({'headers': headers, 'rows': rows})
+    return {'specs': specs, 'tables': tables}
+
+
+def _ready(_: int) -> bool:
+    return True
+
+
+def _init_worker(started: Any) -> None:
+    global _started
+    _started = started
+
+
+def _run_task(key: str, fn: Callable[[bytes], Any], content: bytes) -> Any:
+    _started.put(key)
+    return fn(content)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool, _started
+    with _lock:
+        if _pool is None:
+            workers = CONFIG['detail']['workers']
+            # Spawned workers don't inherit the fetcher's event loop thread or open sockets
+            context = multiprocessing.get_context('spawn')
+            _started = context.Queue()
+            _pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=context, initializer=_init_worker, initargs=(_started,)
+            )
+            # Start the workers up front so process startup never counts against a task timeout
+            list(_pool.map(_ready, range(workers)))
+        return _pool
+
+
+def _reset_pool(terminate: bool = False) -> None:
+    """Drop the pool; with terminate, also kill workers stuck in a task."""
+    global _pool
+    with _lock:
+        if _pool is not None:
+            # A running task can't be cancelled, only its process stopped
+            processes = list((getattr(_pool, '_processes', None) or {}).values())
+            _pool.shutdown(wait=False, cancel_futures=True)
+            if terminate:
+                for process in processes:
+                    process.terminate()
+            _pool = None
+
+
+def _drain_started(started: Dict[str, float]) -> None:
+    while True:
+        try:
+            key = _started.get_nowait()
+        except (queue.Empty, OSError, ValueError):
+            return
+        started.setdefault(key, time.monotonic())
+
+
+def parse_in_pool(
+    contents: Dict[str, bytes],
+    fn: Callable[[bytes], Any] = parse_detail_page,
+    timeout: Optional[float] = None
+) -> Dict[str, Any]:
+    """Run fn over each page's bytes in the worker processes.
+
+    Returns a mapping of key to result; pages that fail or run longer than
+    the per-task timeout are left out. A task that overruns is counted from
+    the moment a worker picked it up; its worker is stuck, so the pool is
+    recycled and the unfinished pages are resubmitted to the new one.
+    """
+    if timeout is None:
+        timeout = CONFIG['detail']['task_timeout']
+    pool = _get_pool()
+    pending = {pool.submit(_run_task, key, fn, content): key for key, content in contents.items()}
+    started: Dict[str, float] = {}
+    results = {}
+    while pending:
+        done, _ = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+        _drain_started(started)
+        for future in done:
+            key = pending.pop(future)
+            try:
+                results[key] = future.result()
+            except BrokenProcessPool as e:
+                metrics.incr('worker_pool_broken')
+                logger.error(f"Worker pool broke while parsing {key}: {e}")
+                _reset_pool(terminate=True)
+                return results
+            except Exception as e:
+                metrics.incr('worker_parse_errors')
+                logger.error(f"Error parsing {key} in worker: {e}")
+
+        now = time.monotonic()
+        overdue = [f for f, key in pending.items() if key in started and now - started[key] > timeout]
+        if overdue:
+            for future in overdue:
+                metrics.incr('worker_parse_timeouts')
+                logger.warning(f"Parsing {pending.pop(future)} exceeded {timeout}s, skipped")
+            metrics.incr('worker_pool_recycled')
+            _reset_pool(terminate=True)
+            pool = _get_pool()
+            pending = {pool.submit(_run_task, key, fn, contents[key]): key for key in pending.values()}
+            started = {}
+    return results
+
+
+def shutdown_workers() -> None:
+    """Stop the worker processes."""
+    _reset_pool()
+
+
+atexit.register(shutdown_workers)
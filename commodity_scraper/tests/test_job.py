@@ -0,0 +1,61 @@
+# tests/test_job.py
+
+import json
+import pytest
+from config.settings import CONFIG
+import main
+from benchmarks.fixtures import load_page
+from src import cdc, database, fetcher, scraper
+from src.fetcher import Page
+
+URL = 'http://stub/commodities'
+SOYBEANS = b'<td class="datatable-item">1042.75</td>'
+
+
+@pytest.fixture
+def page(tmp_path, monkeypatch):
+    """Run main.job offline against the saved fixture page, with every output in tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(CONFIG, 'scrape_urls', [URL])
+    monkeypatch.setitem(CONFIG['db'], 'url', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setitem(CONFIG['detail'], 'enabled', False)
+    monkeypatch.setattr(database, '_engine', None)
+    monkeypatch.setattr(fetcher, '_state', None)
+    monkeypatch.setattr(fetcher, '_pending', {})
+    monkeypatch.setattr(scraper, '_last_frames', {})
+    monkeypatch.setattr(scraper, '_pending_frames', {})
+    monkeypatch.setattr(cdc, '_previous', None)
+    content = {'body': load_page()}
+    monkeypatch.setattr(scraper, 'fetch_pages', lambda urls, conditional=True: {
+        url: Page(content['body']) for url in urls
+    })
+    yield content
+    database.dispose_engine()
+
+
+def _soybeans_price() -> float:
+    df = database.read_latest_snapshot()
+    return float(df.loc[df['commodity'].astype(str) == 'Soybeans', 'price'].iloc[0])
+
+
+def test_failed_database_load_is_retried_on_an_unchanged_page(page, monkeypatch):
+    assert main.job() == 'ok'
+    assert SOYBEANS in page['body']
+    page['body'] = page['body'].replace(SOYBEANS, b'<td class="datatable-item">1050.00</td>')
+
+    def database_down(*args, **kwargs):
+        raise RuntimeError("database unavailable")
+    upsert = database.upsert_dataframe
+    monkeypatch.setattr(database, 'upsert_dataframe', database_down)
+    assert main.job() == 'sinks_failed'
+    assert _soybeans_price() == 1042.75
+
+    # Same page again: it is scraped and diffed again rather than skipped as unchanged
+    monkeypatch.setattr(database, 'upsert_dataframe', upsert)
+    assert main.job() == 'ok'
+    assert _soybeans_price() == 1050.0
+    assert main.job() == 'unchanged'
+
+    with open(CONFIG['cdc']['stream_file']) as f:
+        updates = [change for change in map(json.loads, f) if change['op'] == 'update']
+    assert [(u['commodity'], u['price']) for u in updates] == [('Soybeans', 1050.0)]
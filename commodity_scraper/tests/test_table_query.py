@@ -0,0 +1,66 @@
+# tests/test_table_query.py
+
+import pandas as pd
+import pytest
+from config.settings import CONFIG
+from src import database
+from src.history import append_history
+from src.schema import enforce_schema
+from src.table_query import parse_filter_query, query_page
+
+ROWS = pd.DataFrame({
+    'commodity': ['Wheat', 'Corn', 'Soybeans'],
+    'price': [1042.0, 455.5, 1189.25],
+    'date': ['Apr/11', 'Apr/11', 'Apr/10'],
+    'timestamp': pd.to_datetime(['2026-04-11 10:00', '2026-04-11 10:00', '2025-04-10 10:00']),
+})
+
+
+@pytest.fixture(params=['db', 'history'])
+def source(request, tmp_path, monkeypatch):
+    monkeypatch.setitem(CONFIG['dashboard'], 'table_source', request.param)
+    monkeypatch.setitem(CONFIG['history'], 'path', str(tmp_path / 'history'))
+    monkeypatch.setitem(CONFIG['db'], 'url', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(database, '_engine', None)
+    df = enforce_schema(ROWS.copy())
+    if request.param == 'db':
+        database.upsert_dataframe(df)
+    else:
+        append_history(df)
+    yield request.param
+    database.dispose_engine()
+
+
+def test_parse_filter_query_keeps_text_operands():
+    assert parse_filter_query('{price} contains 1042 && {timestamp} datestartswith 2026 && {price} > 500') == [
+        ('price', 'contains', '1042'),
+        ('timestamp', 'datestartswith', '2026'),
+        ('price', '>', 500.0),
+    ]
+
+
+def test_parse_filter_query_keeps_timestamp_operands():
+    assert parse_filter_query('{timestamp} > 2026') == [('timestamp', '>', '2026')]
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('{price} contains 1042', ['Wheat']),
+    ('{timestamp} datestartswith 2026', ['Corn', 'Wheat']),
+    ('{date} = Apr/11', ['Corn', 'Wheat']),
+    ('{price} >= 1000', ['Soybeans', 'Wheat']),
+    ('{timestamp} > 2026', ['Corn', 'Wheat']),
+    ('{timestamp} < 2026-01-01', ['Soybeans']),
+])
+def test_query_page_filters(source, query, expected):
+    records, total = query_page(query, [], 0, 10)
+    assert sorted(r['commodity'] for r in records) == expected
+    assert total == len(expected)
+
+
+@pytest.mark.parametrize('direction, expected', [
+    ('asc', ['Corn', 'Soybeans', 'Wheat']),
+    ('desc', ['Wheat', 'Soybeans', 'Corn']),
+])
+def test_query_page_sorts_commodities_by_name(source, direction, expected):
+    records, _ = query_page('', [{'column_id': 'commodity', 'direction': direction}], 0, 10)
+    assert [r['commodity'] for r in records] == expected
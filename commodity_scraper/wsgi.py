@@ -0,0 +1,10 @@
+# wsgi.py
+"""WSGI entry point for the dashboard, e.g. gunicorn -w 4 --threads 8 -k gthread wsgi:server"""
+
+from src.logging_setup import setup_logging
+from src.dashboard import create_dashboard
+
+# The scrape process owns the log files; workers log to stderr
+setup_logging(files=False)
+app = create_dashboard()
+server = app.server